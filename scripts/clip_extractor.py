@@ -16,14 +16,36 @@ from __future__ import annotations
 
 import argparse
 import json
+import math
+import multiprocessing
 import os
 import random
 import shutil
 import subprocess
 import sys
 import zipfile
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+from multiprocessing.synchronize import BoundedSemaphore
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Iterator
+
+import orjson
+
+_INDEX_BUFFER = 1 << 20
+_UNZIP_WORKERS = 4
+_COPY_WORKERS = 8
+_FFMPEG_THREADS = 2
+# Caps concurrent ffmpeg decoders across pool workers. Created by
+# extract_clips when it starts a process pool and installed in each worker by
+# _init_worker; serial runs decode one video at a time and leave it unset.
+_FFMPEG_SEM: BoundedSemaphore | None = None
+
+
+def _init_worker(ffmpeg_sem: BoundedSemaphore) -> None:
+    global _FFMPEG_SEM
+    _FFMPEG_SEM = ffmpeg_sem
 
 
 def _read_lines(path: Path) -> list[str]:
@@ -33,68 +55,199 @@ def _read_lines(path: Path) -> list[str]:
             line = raw.strip()
             if not line:
                 continue
-            lines.append(line)
+            # Consecutive steps often repeat the same action/goal text.
+            lines.append(sys.intern(line))
     return lines
 
 
+def _read_optional_lines(path: Path) -> list[str]:
+    try:
+        return _read_lines(path)
+    except FileNotFoundError:
+        return []
+
+
 def _ensure_frames(video_path: Path, frames_dir: Path, fps: int) -> list[Path]:
     frames_dir.mkdir(parents=True, exist_ok=True)
-    existing = sorted(p for p in frames_dir.glob("*.jpg") if p.is_file())
+    existing = _list_frames(frames_dir)
     if existing:
         return existing
+    _ensure_frames_batch(video_path, frames_dir, fps)
+    return _list_frames(frames_dir)
+
+
+def _list_frames(frames_dir: Path) -> list[Path]:
+    # DirEntry.is_file() reuses the d_type from the directory read, so regular
+    # files need no extra stat (symlinked frames are still followed).
+    with os.scandir(frames_dir) as entries:
+        names = [entry.name for entry in entries if entry.name.endswith(".jpg") and entry.is_file()]
+    names.sort()
+    return [frames_dir / name for name in names]
+
+
+def _ensure_frames_batch(
+    video_path: Path,
+    frames_dir: Path,
+    fps: int,
+    frame_indices: Iterable[int] | None = None,
+) -> None:
+    # One ffmpeg process per video; never spawn per frame. Sparse callers pass
+    # source frame numbers, which are folded into a single select expression.
     ffmpeg = shutil.which("ffmpeg")
     if ffmpeg is None:
         raise RuntimeError("ffmpeg not found; provide pre-extracted frames.")
+    if frame_indices is None:
+        video_filter = f"fps={fps}"
+    else:
+        select = "+".join(f"eq(n,{idx})" for idx in sorted(set(frame_indices)))
+        if not select:
+            return
+        video_filter = f"select='{select}',setpts=N/TB"
     output_pattern = frames_dir / "%06d.jpg"
     cmd = [
         ffmpeg,
+        "-threads",
+        str(_FFMPEG_THREADS),
         "-i",
         str(video_path),
         "-vf",
-        f"fps={fps}",
+        video_filter,
+        "-vsync",
+        "0",
         "-q:v",
         "2",
         "-start_number",
         "0",
         str(output_pattern),
     ]
-    subprocess.run(cmd, check=True)
-    return sorted(p for p in frames_dir.glob("*.jpg") if p.is_file())
+    with _FFMPEG_SEM if _FFMPEG_SEM is not None else nullcontext():
+        subprocess.run(cmd, check=True, stdin=subprocess.DEVNULL)
 
 
 def _relative_paths(paths: list[Path], root: Path) -> list[str]:
     return [str(p.relative_to(root)) for p in paths]
 
 
-def _indices_recent(t: int) -> list[int]:
-    return list(range(t - 7, t + 1))
+# Clip windows as (start, stop, stride) offsets from the anchor t.
+_RECENT_WINDOW = (-7, 1, 1)
+_LOOKAHEAD_WINDOW = (0, 8, 1)
+# 60s window at 2FPS -> 120 frames; sample every 2s -> 30 frames
+_SUMMARY_WINDOW = (-120, 0, 4)
+_LOOKAHEAD_SUMMARY_WINDOW = (0, 120, 4)
+
+
+def _window(t: int, offsets: tuple[int, int, int], count: int) -> slice:
+    lo, hi, stride = offsets
+    start = t + lo
+    if start < 0:
+        # First non-negative index on the same stride grid.
+        start %= stride
+    return slice(start, min(t + hi, count), stride)
 
 
-def _indices_lookahead(t: int) -> list[int]:
-    return list(range(t, t + 8))
+def _anchor_range(count: int, allow_partial: bool) -> tuple[int, int]:
+    if allow_partial:
+        return 0, count - 1
+    return 120, count - 117
 
 
-def _indices_summary(t: int) -> list[int]:
-    # 60s window at 2FPS -> 120 frames; sample every 2s -> 30 frames
-    return list(range(t - 120, t, 4))
+def _has_frames(frames_dir: Path) -> bool:
+    return frames_dir.is_dir() and bool(_list_frames(frames_dir))
 
 
-def _indices_lookahead_summary(t: int) -> list[int]:
-    return list(range(t, t + 120, 4))
+def _needs_video(session_dir: Path, frames_dir: Path, allow_partial: bool) -> bool:
+    actions = _read_optional_lines(session_dir / "compiled_actions.jsonl")
+    min_t, max_t = _anchor_range(len(actions), allow_partial)
+    if min_t >= max_t:
+        return False
+    return not _has_frames(frames_dir)
 
 
-def _all_in_range(indices: Iterable[int], start: int, end: int) -> bool:
-    return all(start <= idx <= end for idx in indices)
+def _extract_members(
+    zip_path: Path,
+    names: list[str],
+    unpack_dir: Path,
+    video_name: str | None = None,
+    frames_dir: Path | None = None,
+    allow_partial: bool = False,
+) -> None:
+    # The video is unpacked last, and only if the session's metadata says it
+    # will be decoded; skipped or already-cached sessions never pay for it.
+    # A later run whose flags do need it pulls it in via _restore_video.
+    with zipfile.ZipFile(zip_path, "r") as archive:
+        for name in names:
+            if name != video_name:
+                archive.extract(name, unpack_dir)
+        if video_name is None or video_name not in names or frames_dir is None:
+            return
+        session_dir = unpack_dir / video_name.rpartition("/")[0]
+        if _needs_video(session_dir, frames_dir, allow_partial):
+            archive.extract(video_name, unpack_dir)
+
+
+def _restore_video(zip_path: Path, unpack_dir: Path, video_path: Path) -> None:
+    member = video_path.relative_to(unpack_dir).as_posix()
+    with zipfile.ZipFile(zip_path, "r") as archive:
+        try:
+            archive.extract(member, unpack_dir)
+        except KeyError:
+            pass
 
 
-def _extract_zip(zip_path: Path, output_dir: Path) -> Path:
+def _extract_zip(
+    zip_path: Path, output_dir: Path, executor: ThreadPoolExecutor, allow_partial: bool = False
+) -> tuple[Path, dict[str, Future[None]]]:
     unpack_dir = output_dir / "_sessions" / zip_path.stem
     if unpack_dir.exists():
-        return unpack_dir
+        return unpack_dir, {}
     unpack_dir.mkdir(parents=True, exist_ok=True)
     with zipfile.ZipFile(zip_path, "r") as archive:
-        archive.extractall(unpack_dir)
-    return unpack_dir
+        names = archive.namelist()
+    prefix = "sessions/" if any(name.startswith("sessions/") for name in names) else ""
+    groups: dict[str, list[str]] = {}
+    for name in names:
+        rest = name[len(prefix) :] if name.startswith(prefix) else ""
+        session_id, sep, _ = rest.partition("/")
+        groups.setdefault(session_id if sep else "", []).append(name)
+    # Session dirs are created up front so jobs never race on shared parents
+    # and the sessions root can be listed before extraction finishes.
+    for session_id in groups:
+        (unpack_dir / prefix / session_id).mkdir(parents=True, exist_ok=True)
+    jobs: dict[str, Future[None]] = {}
+    for session_id, members in sorted(groups.items()):
+        if not session_id:
+            jobs[session_id] = executor.submit(_extract_members, zip_path, members, unpack_dir)
+            continue
+        jobs[session_id] = executor.submit(
+            _extract_members,
+            zip_path,
+            members,
+            unpack_dir,
+            video_name=f"{prefix}{session_id}/video.mp4",
+            frames_dir=output_dir / "frames" / session_id,
+            allow_partial=allow_partial,
+        )
+    return unpack_dir, jobs
+
+
+def _list_sessions(sessions_root: Path) -> list[Path]:
+    with os.scandir(sessions_root) as entries:
+        names = [entry.name for entry in entries if entry.is_dir()]
+    names.sort()
+    return [sessions_root / name for name in names]
+
+
+def _ready_sessions(session_dirs: list[Path], jobs: dict[str, Future[None]]) -> Iterator[Path]:
+    # Members outside any session dir are extracted first; waiting on them
+    # surfaces their errors before any session is handed on.
+    shared = jobs.get("")
+    if shared is not None:
+        shared.result()
+    for session_dir in session_dirs:
+        job = jobs.get(session_dir.name)
+        if job is not None:
+            job.result()
+        yield session_dir
 
 
 def _find_sessions_root(unpack_dir: Path) -> Path:
@@ -105,7 +258,6 @@ def _find_sessions_root(unpack_dir: Path) -> Path:
 
 
 def _link_file(src: Path, dst: Path, mode: str) -> None:
-    dst.parent.mkdir(parents=True, exist_ok=True)
     if mode == "symlink":
         dst.symlink_to(src)
     elif mode == "hardlink":
@@ -116,8 +268,167 @@ def _link_file(src: Path, dst: Path, mode: str) -> None:
         raise ValueError(f"unknown link mode: {mode}")
 
 
-def _clip_indices(indices: Iterable[int], count: int) -> list[int]:
-    return [idx for idx in indices if 0 <= idx < count]
+def _link_many(
+    srcs: list[Path], dst_dir: Path, mode: str, copy_pool: ThreadPoolExecutor | None = None
+) -> None:
+    dst_dir.mkdir(parents=True, exist_ok=True)
+    if mode == "hardlink":
+        dst_root = os.fspath(dst_dir)
+        for src in srcs:
+            os.link(os.fspath(src), os.path.join(dst_root, src.name))
+        return
+    if mode == "copy" and copy_pool is not None:
+        # copy2 blocks in read/write syscalls with the GIL released, so one
+        # sample's copies are issued together instead of one after another.
+        list(copy_pool.map(shutil.copy2, srcs, [dst_dir / src.name for src in srcs]))
+        return
+    for src in srcs:
+        _link_file(src, dst_dir / src.name, mode)
+
+
+def _process_session(
+    session_dir: Path,
+    zip_path: Path,
+    unpack_dir: Path,
+    output_dir: Path,
+    fps: int,
+    step: int,
+    allow_partial: bool,
+    export_clips: bool,
+    export_ratio: float,
+    link_mode: str,
+    seed: int,
+) -> tuple[str, int, bytes]:
+    session_id = session_dir.name
+    video_path = session_dir / "video.mp4"
+    compiled_actions = session_dir / "compiled_actions.jsonl"
+    goal_path = session_dir / "goal.jsonl"
+    instruct_path = session_dir / "labeling_instruct.jsonl"
+
+    try:
+        actions = _read_lines(compiled_actions)
+    except FileNotFoundError:
+        print(f"skip {session_id}: missing video or compiled_actions", file=sys.stderr)
+        return session_id, 0, b""
+    if not actions:
+        print(f"skip {session_id}: no frames or actions", file=sys.stderr)
+        return session_id, 0, b""
+    min_t, max_t = _anchor_range(len(actions), allow_partial)
+    if min_t >= max_t:
+        print(f"warning: {session_id} not enough frames for windows", file=sys.stderr)
+        return session_id, 0, b""
+
+    frames_dir = output_dir / "frames" / session_id
+    if not video_path.exists() and not _has_frames(frames_dir):
+        # The unzip that created _sessions/ may have left the video packed
+        # because its flags skipped this session, or frames/ was cleared since.
+        _restore_video(zip_path, unpack_dir, video_path)
+    if not video_path.exists() and not _has_frames(frames_dir):
+        print(f"skip {session_id}: missing video or compiled_actions", file=sys.stderr)
+        return session_id, 0, b""
+    frames = _ensure_frames(video_path, frames_dir, fps)
+    if not frames:
+        print(f"skip {session_id}: no frames or actions", file=sys.stderr)
+        return session_id, 0, b""
+
+    count = min(len(frames), len(actions))
+    if len(frames) != len(actions):
+        print(
+            f"warning: {session_id} frames({len(frames)}) != actions({len(actions)}); using {count}",
+            file=sys.stderr,
+        )
+    frames = frames[:count]
+    actions = actions[:count]
+
+    goals = _read_optional_lines(goal_path)
+    instructs = _read_optional_lines(instruct_path)
+    # Padded to count so the anchor loop indexes them without bounds checks.
+    goals = goals[:count] + [""] * (count - len(goals))
+    instructs = instructs[:count] + [""] * (count - len(instructs))
+
+    min_t, max_t = _anchor_range(count, allow_partial)
+    if min_t >= max_t:
+        print(f"warning: {session_id} not enough frames for windows", file=sys.stderr)
+        return session_id, 0, b""
+
+    # Seeded per session so export sampling does not depend on worker scheduling.
+    rng = random.Random(f"{seed}:{session_id}")
+    next_export = _export_gap(rng, export_ratio) if export_clips else -1
+    lines = bytearray()
+    written = 0
+    rel_frames = _relative_paths(frames, output_dir)
+    dumps = orjson.dumps
+    dumps_option = orjson.OPT_APPEND_NEWLINE
+
+    # Owned by this call so no copy threads outlive the session or get
+    # inherited, threadless, by forked pool workers.
+    copy_pool = None
+    if export_clips and link_mode == "copy":
+        copy_pool = ThreadPoolExecutor(max_workers=_COPY_WORKERS)
+    try:
+        for anchor_no, t in enumerate(range(min_t, max_t + 1, step)):
+            # Without allow_partial, min_t/max_t already keep every window in range.
+            recent = _window(t, _RECENT_WINDOW, count)
+            summary = _window(t, _SUMMARY_WINDOW, count)
+            lookahead = _window(t, _LOOKAHEAD_WINDOW, count)
+            lookahead_summary = _window(t, _LOOKAHEAD_SUMMARY_WINDOW, count)
+
+            sample_id = f"{session_id}_t{t:06d}"
+            record = {
+                "sample_id": sample_id,
+                "session_id": session_id,
+                "anchor_t": t,
+                "recent_clip": rel_frames[recent],
+                "summary_clip": rel_frames[summary],
+                "lookahead_clip": rel_frames[lookahead],
+                "lookahead_summary_clip": rel_frames[lookahead_summary],
+                "action_t": actions[t],
+                "goal_t": goals[t],
+                "instruct_t": instructs[t],
+            }
+
+            lines += dumps(record, option=dumps_option)
+            written += 1
+
+            if anchor_no == next_export:
+                next_export += 1 + _export_gap(rng, export_ratio)
+                sample_dir = output_dir / "clips" / sample_id
+                _link_many(frames[recent], sample_dir / "recent", link_mode, copy_pool)
+                _link_many(frames[summary], sample_dir / "summary", link_mode, copy_pool)
+                _link_many(frames[lookahead], sample_dir / "lookahead", link_mode, copy_pool)
+                _link_many(
+                    frames[lookahead_summary], sample_dir / "lookahead_summary", link_mode, copy_pool
+                )
+                (sample_dir / "action.txt").write_text(actions[t] + "\n", encoding="utf-8")
+                if record["goal_t"]:
+                    (sample_dir / "goal.txt").write_text(record["goal_t"] + "\n", encoding="utf-8")
+                if record["instruct_t"]:
+                    (sample_dir / "labeling_instruct.txt").write_text(
+                        record["instruct_t"] + "\n", encoding="utf-8"
+                    )
+                meta = {"sample_id": sample_id, "anchor_t": t, "session_id": session_id}
+                (sample_dir / "meta.json").write_text(
+                    json.dumps(meta, ensure_ascii=True, indent=2) + "\n"
+                )
+    finally:
+        if copy_pool is not None:
+            copy_pool.shutdown()
+
+    return session_id, written, bytes(lines)
+
+
+def _export_gap(rng: random.Random, ratio: float) -> int:
+    # Anchors skipped before the next export: a geometric draw replaces one
+    # Bernoulli trial per anchor with one random number per exported sample.
+    if ratio >= 1.0:
+        return 0
+    if ratio <= 0.0:
+        return sys.maxsize
+    return int(math.log(1.0 - rng.random()) / math.log(1.0 - ratio))
+
+
+def _default_workers() -> int:
+    return max(1, (os.cpu_count() or 2) // 2)
 
 
 def extract_clips(
@@ -130,118 +441,55 @@ def extract_clips(
     export_ratio: float = 0.01,
     link_mode: str = "hardlink",
     seed: int = 0,
+    workers: int | None = None,
 ) -> tuple[Path, int]:
     output_dir.mkdir(parents=True, exist_ok=True)
-    rng = random.Random(seed)
-
-    unpack_dir = _extract_zip(zip_path, output_dir)
-    sessions_root = _find_sessions_root(unpack_dir)
-    if not sessions_root.exists():
-        raise ValueError("sessions root not found after unzip.")
 
     index_path = output_dir / "clip_index.jsonl"
     samples_written = 0
-
-    with index_path.open("w", encoding="utf-8") as index_handle:
-        for session_dir in sorted(p for p in sessions_root.iterdir() if p.is_dir()):
-            session_id = session_dir.name
-            video_path = session_dir / "video.mp4"
-            compiled_actions = session_dir / "compiled_actions.jsonl"
-            goal_path = session_dir / "goal.jsonl"
-            instruct_path = session_dir / "labeling_instruct.jsonl"
-
-            if not video_path.exists() or not compiled_actions.exists():
-                print(f"skip {session_id}: missing video or compiled_actions", file=sys.stderr)
-                continue
-
-            frames_dir = output_dir / "frames" / session_id
-            frames = _ensure_frames(video_path, frames_dir, fps)
-            actions = _read_lines(compiled_actions)
-            if not frames or not actions:
-                print(f"skip {session_id}: no frames or actions", file=sys.stderr)
-                continue
-
-            count = min(len(frames), len(actions))
-            if len(frames) != len(actions):
-                print(
-                    f"warning: {session_id} frames({len(frames)}) != actions({len(actions)}); using {count}",
-                    file=sys.stderr,
-                )
-            frames = frames[:count]
-            actions = actions[:count]
-
-            goals = _read_lines(goal_path) if goal_path.exists() else []
-            instructs = _read_lines(instruct_path) if instruct_path.exists() else []
-
-            if allow_partial:
-                min_t = 0
-                max_t = count - 1
+    workers = workers or _default_workers()
+
+    # Sessions are unzipped in the background and handed on as soon as each
+    # one is complete, so decoding overlaps with the rest of the unzip.
+    with ThreadPoolExecutor(max_workers=_UNZIP_WORKERS) as unzip_executor:
+        unpack_dir, unzip_jobs = _extract_zip(
+            zip_path, output_dir, unzip_executor, allow_partial=allow_partial
+        )
+        task = partial(
+            _process_session,
+            zip_path=zip_path,
+            unpack_dir=unpack_dir,
+            output_dir=output_dir,
+            fps=fps,
+            step=step,
+            allow_partial=allow_partial,
+            export_clips=export_clips,
+            export_ratio=export_ratio,
+            link_mode=link_mode,
+            seed=seed,
+        )
+        sessions_root = _find_sessions_root(unpack_dir)
+        if not sessions_root.exists():
+            raise ValueError("sessions root not found after unzip.")
+        session_dirs = _list_sessions(sessions_root)
+        ready = _ready_sessions(session_dirs, unzip_jobs)
+
+        with index_path.open("wb", buffering=_INDEX_BUFFER) as index_handle:
+            if workers <= 1 or len(session_dirs) <= 1:
+                for _, written, data in map(task, ready):
+                    index_handle.write(data)
+                    samples_written += written
             else:
-                min_t = 120
-                max_t = count - 117
-            if min_t >= max_t:
-                print(f"warning: {session_id} not enough frames for windows", file=sys.stderr)
-                continue
-
-            for t in range(min_t, max_t + 1, step):
-                recent_idx = _indices_recent(t)
-                summary_idx = _indices_summary(t)
-                lookahead_idx = _indices_lookahead(t)
-                lookahead_summary_idx = _indices_lookahead_summary(t)
-
-                if allow_partial:
-                    recent_idx = _clip_indices(recent_idx, count)
-                    summary_idx = _clip_indices(summary_idx, count)
-                    lookahead_idx = _clip_indices(lookahead_idx, count)
-                    lookahead_summary_idx = _clip_indices(lookahead_summary_idx, count)
-                else:
-                    if recent_idx[0] < 0 or lookahead_summary_idx[-1] >= count:
-                        continue
-
-                sample_id = f"{session_id}_t{t:06d}"
-                record = {
-                    "sample_id": sample_id,
-                    "session_id": session_id,
-                    "anchor_t": t,
-                    "recent_clip": _relative_paths([frames[i] for i in recent_idx], output_dir),
-                    "summary_clip": _relative_paths([frames[i] for i in summary_idx], output_dir),
-                    "lookahead_clip": _relative_paths([frames[i] for i in lookahead_idx], output_dir),
-                    "lookahead_summary_clip": _relative_paths(
-                        [frames[i] for i in lookahead_summary_idx], output_dir
-                    ),
-                    "action_t": actions[t],
-                    "goal_t": goals[t] if t < len(goals) else "",
-                    "instruct_t": instructs[t] if t < len(instructs) else "",
-                }
-
-                index_handle.write(json.dumps(record, ensure_ascii=True) + "\n")
-                samples_written += 1
-
-                if export_clips and rng.random() <= export_ratio:
-                    sample_dir = output_dir / "clips" / sample_id
-                    recent_dir = sample_dir / "recent"
-                    summary_dir = sample_dir / "summary"
-                    lookahead_dir = sample_dir / "lookahead"
-                    lookahead_summary_dir = sample_dir / "lookahead_summary"
-                    for src in [frames[i] for i in recent_idx]:
-                        _link_file(src, recent_dir / src.name, link_mode)
-                    for src in [frames[i] for i in summary_idx]:
-                        _link_file(src, summary_dir / src.name, link_mode)
-                    for src in [frames[i] for i in lookahead_idx]:
-                        _link_file(src, lookahead_dir / src.name, link_mode)
-                    for src in [frames[i] for i in lookahead_summary_idx]:
-                        _link_file(src, lookahead_summary_dir / src.name, link_mode)
-                    (sample_dir / "action.txt").write_text(actions[t] + "\n", encoding="utf-8")
-                    if record["goal_t"]:
-                        (sample_dir / "goal.txt").write_text(record["goal_t"] + "\n", encoding="utf-8")
-                    if record["instruct_t"]:
-                        (sample_dir / "labeling_instruct.txt").write_text(
-                            record["instruct_t"] + "\n", encoding="utf-8"
-                        )
-                    meta = {"sample_id": sample_id, "anchor_t": t, "session_id": session_id}
-                    (sample_dir / "meta.json").write_text(
-                        json.dumps(meta, ensure_ascii=True, indent=2) + "\n"
-                    )
+                ffmpeg_sem = multiprocessing.BoundedSemaphore(_default_workers())
+                with ProcessPoolExecutor(
+                    max_workers=min(workers, len(session_dirs)),
+                    initializer=_init_worker,
+                    initargs=(ffmpeg_sem,),
+                ) as executor:
+                    # map() yields in submission order, so the index stays sorted by session.
+                    for _, written, data in executor.map(task, ready):
+                        index_handle.write(data)
+                        samples_written += written
 
     return index_path, samples_written
 
@@ -266,6 +514,12 @@ def main() -> int:
         help="How to materialize per-sample folders.",
     )
     parser.add_argument("--seed", type=int, default=0, help="Random seed for export sampling.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Sessions processed in parallel (default: half the CPU count).",
+    )
     args = parser.parse_args()
 
     index_path, samples_written = extract_clips(
@@ -278,6 +532,7 @@ def main() -> int:
         export_ratio=args.export_ratio,
         link_mode=args.link_mode,
         seed=args.seed,
+        workers=args.workers,
     )
     print(f"wrote {samples_written} samples to {index_path}")
     return 0
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Dataset builder for planner and controller training sets.
+
+Usage examples:
+  python scripts/dataset_builder.py --input-dir dataset/out --output-dir dataset/build
+  python scripts/dataset_builder.py --input-dir dataset/out --output-dir dataset/build --emit controller
+
+clip_index.jsonl is parsed once and every record is fed to each selected
+emitter, so building both outputs costs a single pass over the index.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import mmap
+import os
+from pathlib import Path
+from typing import Any, Callable, Iterator, Sequence
+
+import orjson
+
+_OUTPUT_BUFFER = 1 << 20
+
+_PLANNER_REQUIRED = (
+    "recent_clip",
+    "summary_clip",
+    "goal_t",
+    "short_goal_dsl",
+    "next_mid_step",
+    "attempt",
+)
+_CONTROLLER_REQUIRED = (
+    "recent_clip",
+    "action_t",
+    "short_goal_dsl",
+)
+
+
+def _iter_jsonl(path: Path) -> Iterator[dict]:
+    # Lines are sliced straight out of the mapped file; no text decoding or
+    # per-line read buffers.
+    with path.open("rb") as handle:
+        if os.fstat(handle.fileno()).st_size == 0:
+            return
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            start = 0
+            size = len(mapped)
+            while start < size:
+                end = mapped.find(b"\n", start)
+                if end < 0:
+                    end = size
+                line = mapped[start:end]
+                start = end + 1
+                if line.strip():
+                    yield orjson.loads(line)
+
+
+def _planner_sample(
+    record: dict[str, Any], report: dict[str, Any], allow_empty_retrieval: bool
+) -> dict[str, Any] | None:
+    if not all(key in record for key in _PLANNER_REQUIRED):
+        report["skipped"] += 1
+        return None
+
+    retrieval = record.get("retrieved_memory")
+    if retrieval is None:
+        report["missing_retrieval"] += 1
+        if allow_empty_retrieval:
+            retrieval = {}
+        else:
+            report["skipped"] += 1
+            return None
+
+    return {
+        "input": {
+            "recent_clip": record.get("recent_clip"),
+            "summary_clip": record.get("summary_clip"),
+            "goal": record.get("goal_t"),
+            "labeling_instruct": record.get("instruct_t", ""),
+            "retrieved_memory": retrieval,
+        },
+        "target": {
+            "goal": record.get("goal"),
+            "next_mid_step": record.get("next_mid_step"),
+            "short_goal_dsl": record.get("short_goal_dsl"),
+            "horizon_steps": record.get("horizon_steps"),
+            "done_evidence": record.get("done_evidence"),
+            "fallback_if_failed": record.get("fallback_if_failed"),
+            "uncertainty": record.get("uncertainty"),
+            "attempt": record.get("attempt"),
+        },
+    }
+
+
+def _controller_sample(
+    record: dict[str, Any], report: dict[str, Any], allow_empty_retrieval: bool
+) -> dict[str, Any] | None:
+    if not all(key in record for key in _CONTROLLER_REQUIRED):
+        report["skipped"] += 1
+        return None
+    if not record.get("action_t"):
+        report["missing_action"] += 1
+        report["skipped"] += 1
+        return None
+
+    return {
+        "input": {
+            "image_t": record.get("recent_clip")[-1],
+            "short_goal_dsl": record.get("short_goal_dsl"),
+            "plan_id": record.get("plan_id", ""),
+        },
+        "target": {
+            "action_t": record.get("action_t"),
+        },
+        "note": "span-aligned generation not implemented",
+    }
+
+
+_SampleBuilder = Callable[[dict[str, Any], dict[str, Any], bool], dict[str, Any] | None]
+
+# emitter name -> (sample builder, extra report counter)
+_EMITTERS: dict[str, tuple[_SampleBuilder, str]] = {
+    "planner": (_planner_sample, "missing_retrieval"),
+    "controller": (_controller_sample, "missing_action"),
+}
+
+
+def build(
+    index_path: Path,
+    output_dir: Path,
+    emit: Sequence[str],
+    allow_empty_retrieval: bool = False,
+) -> dict[str, dict[str, Any]]:
+    output_dir.mkdir(parents=True, exist_ok=True)
+    reports: dict[str, dict[str, Any]] = {}
+    handles = {}
+    try:
+        for name in emit:
+            _, counter = _EMITTERS[name]
+            out_path = output_dir / f"{name}.jsonl"
+            reports[name] = {
+                "input": str(index_path),
+                "output": str(out_path),
+                "total": 0,
+                "written": 0,
+                "skipped": 0,
+                counter: 0,
+            }
+            handles[name] = out_path.open("wb", buffering=_OUTPUT_BUFFER)
+
+        for record in _iter_jsonl(index_path):
+            for name in emit:
+                report = reports[name]
+                report["total"] += 1
+                sample = _EMITTERS[name][0](record, report, allow_empty_retrieval)
+                if sample is None:
+                    continue
+                handles[name].write(orjson.dumps(sample, option=orjson.OPT_APPEND_NEWLINE))
+                report["written"] += 1
+    finally:
+        for handle in handles.values():
+            handle.close()
+    return reports
+
+
+def main(emit: Sequence[str] | None = None, description: str = "Dataset builder.") -> int:
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--input-dir", type=Path, required=True)
+    parser.add_argument("--output-dir", type=Path, required=True)
+    parser.add_argument("--allow-empty-retrieval", action="store_true")
+    if emit is None:
+        parser.add_argument(
+            "--emit",
+            type=str,
+            default=",".join(_EMITTERS),
+            help="Comma-separated outputs to build: planner, controller.",
+        )
+    args = parser.parse_args()
+
+    if emit is None:
+        emit = list(dict.fromkeys(name.strip() for name in args.emit.split(",") if name.strip()))
+        unknown = [name for name in emit if name not in _EMITTERS]
+        if unknown or not emit:
+            parser.error(f"--emit must list planner and/or controller, got: {args.emit}")
+
+    index_path = args.input_dir / "clip_index.jsonl"
+    if not index_path.exists():
+        raise SystemExit(f"clip_index.jsonl not found: {index_path}")
+
+    reports = build(index_path, args.output_dir, emit, args.allow_empty_retrieval)
+    report: dict[str, Any] = reports[emit[0]] if len(emit) == 1 else reports
+    report_path = args.output_dir / "build_report.json"
+    report_path.write_text(json.dumps(report, ensure_ascii=True, indent=2), encoding="utf-8")
+    print(json.dumps(report, ensure_ascii=True))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
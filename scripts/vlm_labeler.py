@@ -82,12 +82,23 @@ def main() -> int:
     parser.add_argument("--timeout", type=float, default=120.0, help="HTTP timeout in seconds.")
     parser.add_argument("--temperature", type=float, default=0.0, help="Sampling temperature.")
     parser.add_argument("--max-concurrency", type=int, default=4, help="Max concurrent requests.")
-    parser.add_argument("--batch-size", type=int, default=1, help="Batch size per request.")
+    parser.add_argument("--io-workers", type=int, default=8, help="Threads reading/encoding frames (1 = serial).")
+    parser.add_argument(
+        "--http2",
+        action="store_true",
+        help="Multiplex requests over one HTTP/2 connection (needs the h2 package; openai backend).",
+    )
+    parser.add_argument("--batch-size", type=int, default=1, help="Labels written per journal flush (also flushed every 5s).")
     parser.add_argument("--max-retries", type=int, default=3, help="Retry count for failed requests.")
     parser.add_argument("--retry-backoff", type=float, default=1.0, help="Retry backoff base in seconds.")
     parser.add_argument("--overwrite", action="store_true", help="Overwrite existing labels.")
     parser.add_argument("--dry-run", action="store_true", help="Log payloads without sending requests.")
     parser.add_argument("--skip-validation", action="store_true", help="Skip schema/enum validation.")
+    parser.add_argument(
+        "--structured-output",
+        action="store_true",
+        help="Request a JSON schema response and parse it with Pydantic (needs backend support).",
+    )
     parser.add_argument("--no-enums", action="store_true", help="Do not include enums in payload.")
     parser.add_argument("--log-requests", action="store_true", default=True, help="Log requests.")
     parser.add_argument("--no-log-requests", action="store_false", dest="log_requests")
@@ -96,6 +107,16 @@ def main() -> int:
     parser.add_argument("--log-full-payload", action="store_true", default=True, help="Log full payloads.")
     parser.add_argument("--trim-payload", action="store_false", dest="log_full_payload")
     parser.add_argument("--limit", type=int, help="Max samples to process.")
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Reuse labels from a persistent cache keyed by model, prompt and frame content.",
+    )
+    parser.add_argument(
+        "--cache-path",
+        type=Path,
+        help="Label cache file (default: <input-dir>/.labeler_cache.sqlite3).",
+    )
     parser.add_argument("--dsl-ops", type=Path, default=Path("src/common/enums/dsl_ops.json"))
     parser.add_argument("--done-evidence", type=Path, default=Path("src/common/enums/done_evidence.json"))
     parser.add_argument("--fallback-actions", type=Path, default=Path("src/common/enums/fall_back.json"))
@@ -103,6 +124,16 @@ def main() -> int:
     parser.add_argument("--system-prompt-file", type=Path, help="Load system prompt from file.")
     parser.add_argument("--user-prompt-file", type=Path, help="Load user prompt template from file.")
     parser.add_argument("--prompts-dir", type=Path, help="Directory containing system_prompt.txt and user_prompt.txt.")
+    parser.add_argument(
+        "--image-url-prefix",
+        type=str,
+        help="Send frames as <prefix>/<relative path> URLs instead of base64 data URLs.",
+    )
+    parser.add_argument(
+        "--serve-frames",
+        action="store_true",
+        help="Serve --input-dir over a local HTTP server and send frame URLs from it.",
+    )
     args = parser.parse_args()
 
     system_prompt = args.system_prompt
@@ -127,6 +158,8 @@ def main() -> int:
         timeout_sec=args.timeout,
         temperature=args.temperature,
         max_concurrency=args.max_concurrency,
+        io_workers=args.io_workers,
+        http2=args.http2,
         backend=args.backend,
         ollama_format=ollama_format,
         ollama_num_predict=args.ollama_num_predict,
@@ -138,6 +171,7 @@ def main() -> int:
         overwrite=args.overwrite,
         dry_run=args.dry_run,
         validate=not args.skip_validation,
+        structured_output=args.structured_output,
         include_enums=not args.no_enums,
         log_requests=args.log_requests,
         log_responses=args.log_responses,
@@ -149,6 +183,10 @@ def main() -> int:
         done_evidence_path=args.done_evidence,
         fallback_actions_path=args.fallback_actions,
         limit=args.limit,
+        cache_enabled=args.cache,
+        cache_path=args.cache_path,
+        image_url_prefix=args.image_url_prefix.rstrip("/") if args.image_url_prefix else None,
+        serve_frames=args.serve_frames,
     )
 
     run_labeler(config)
@@ -6,17 +6,48 @@ to the index.
 """
 from __future__ import annotations
 
+import asyncio
 import base64
-import json
+import hashlib
+import logging
+import mmap
+import os
+import queue
+import sqlite3
+import sys
+import threading
 import time
 import urllib.error
+import urllib.parse
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from functools import cache, lru_cache, partial
+from itertools import islice
+from logging.handlers import QueueHandler, QueueListener
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from typing import Any, Iterable
+from typing import Any, Callable, Iterable, Iterator, Literal
 
+import httpx
+import orjson
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_openai import ChatOpenAI
+from pydantic import BaseModel, ConfigDict, ValidationError, create_model, field_validator
+
+_WRITE_BUFFER = 1 << 16
+_MMAP_MIN_BYTES = 1 << 16
+_FLUSH_INTERVAL_SEC = 5.0
+# Encoded frames kept for reuse. Consecutive anchors share most of their
+# recent/lookahead frames, and every other anchor lands on the same summary
+# grid, so the samples in flight together touch under ~200 distinct frames.
+# Data URLs run 100-300 KB each; a larger cache only holds memory.
+_FRAME_CACHE_SIZE = 256
+_CLIP_KEYS = ("recent_clip", "summary_clip", "lookahead_clip", "lookahead_summary_clip")
+
+_LOG = logging.getLogger("labeler")
+# Raw responses go through a child logger so `log_responses` is just its level.
+_RESPONSE_LOG = _LOG.getChild("response")
 
 
 @dataclass
@@ -56,11 +87,26 @@ class LabelerConfig:
     done_evidence_path: Path = Path("src/common/enums/done_evidence.json")
     fallback_actions_path: Path = Path("src/common/enums/fall_back.json")
     limit: int | None = None
+    image_url_prefix: str | None = None
+    serve_frames: bool = False
+    io_workers: int = 8
+    http2: bool = False
+    structured_output: bool = False
+    cache_enabled: bool = False
+    cache_path: Path | None = None
 
 
 def _load_json(path: Path) -> dict[str, Any]:
-    with path.open("r", encoding="utf-8") as handle:
-        return json.load(handle)
+    # Enum files are parsed once per content version; callers treat the
+    # returned data as read-only.
+    path_str = os.path.abspath(path)
+    return _load_json_cached(path_str, os.stat(path_str).st_mtime_ns)
+
+
+@lru_cache(maxsize=32)
+def _load_json_cached(path_str: str, mtime_ns: int) -> dict[str, Any]:
+    with open(path_str, "rb") as handle:
+        return orjson.loads(handle.read())
 
 
 def _load_prompt_text(path: Path | None) -> str | None:
@@ -110,65 +156,171 @@ def _load_enum_list(path: Path, keys: Iterable[str]) -> list[str]:
     return []
 
 
-def _read_jsonl(path: Path) -> list[dict[str, Any]]:
-    records: list[dict[str, Any]] = []
-    with path.open("r", encoding="utf-8") as handle:
+def _iter_jsonl(path: Path) -> Iterator[tuple[int, dict[str, Any]]]:
+    # Yields (ordinal, record); blank lines are skipped and not counted, so
+    # ordinals stay valid after _write_jsonl drops them.
+    with path.open("rb") as handle:
+        idx = 0
         for line in handle:
             raw = line.strip()
             if not raw:
                 continue
-            records.append(json.loads(raw))
-    return records
+            yield idx, orjson.loads(raw)
+            idx += 1
 
 
-def _write_jsonl(path: Path, records: list[dict[str, Any]]) -> None:
+def _write_jsonl(path: Path, source: Path, updates: dict[int, dict[str, Any]]) -> None:
+    # Unchanged lines are copied from source as-is; only lines with a journal
+    # entry are parsed and patched. source may be path itself.
     tmp_path = path.with_suffix(path.suffix + ".tmp")
-    with tmp_path.open("w", encoding="utf-8") as handle:
-        for record in records:
-            handle.write(json.dumps(record, ensure_ascii=True) + "\n")
-    tmp_path.replace(path)
+    with source.open("rb") as src, tmp_path.open("wb", buffering=_WRITE_BUFFER) as handle:
+        idx = 0
+        for line in src:
+            raw = line.strip()
+            if not raw:
+                continue
+            entry = updates.get(idx)
+            idx += 1
+            if entry is None:
+                handle.write(raw + b"\n")
+                continue
+            record = orjson.loads(raw)
+            if record.get("sample_id", "") != entry["sample_id"]:
+                _LOG.warning("[warn] index line %d is no longer %s; patch skipped", idx - 1, entry["sample_id"])
+                handle.write(raw + b"\n")
+                continue
+            record.update(entry["patch"])
+            handle.write(orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE))
+        # The data must be on disk before the rename, or a crash can leave
+        # an empty index in place of the old one.
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(tmp_path, path)
+
+
+def _journal_path(output_path: Path) -> Path:
+    return output_path.with_name(output_path.stem + ".patch.jsonl")
 
 
-def _encode_frames(
-    rel_paths: list[str],
+def _load_journal(path: Path) -> dict[int, dict[str, Any]]:
+    updates: dict[int, dict[str, Any]] = {}
+    try:
+        for _, entry in _iter_jsonl(path):
+            updates[entry["idx"]] = entry
+    except orjson.JSONDecodeError:
+        # A crash can leave the last entry half written.
+        _LOG.warning("[warn] truncated patch journal %s; keeping %d entries", path, len(updates))
+    return updates
+
+
+def _matching_patches(index_path: Path, patches: dict[int, dict[str, Any]]) -> dict[int, dict[str, Any]]:
+    # Keeps the patches _write_jsonl will apply: a patch whose index line no
+    # longer holds its sample is dropped so that line is labeled again.
+    kept: dict[int, dict[str, Any]] = {}
+    for idx, record in _iter_jsonl(index_path):
+        entry = patches.get(idx)
+        if entry is None:
+            continue
+        if record.get("sample_id", "") == entry["sample_id"]:
+            kept[idx] = entry
+        else:
+            _LOG.warning("[warn] index line %d is no longer %s; recovered patch dropped", idx, entry["sample_id"])
+    return kept
+
+
+@lru_cache(maxsize=_FRAME_CACHE_SIZE)
+def _encode_one(path_str: str, mtime_ns: int, mime: str, digest: bool) -> tuple[str, str]:
+    # mtime_ns is part of the key so a frame rewritten on disk is re-read.
+    # The finished data URL is cached, so building messages is a lookup.
+    # With digest set, the frame bytes are hashed once here for cache keys.
+    with open(path_str, "rb") as handle:
+        if os.fstat(handle.fileno()).st_size < _MMAP_MIN_BYTES:
+            return _encode_bytes(handle.read(), mime, digest)
+        # Large frames are encoded straight from the page cache instead of
+        # being copied into a bytes object first.
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return _encode_bytes(mapped, mime, digest)
+
+
+def _encode_bytes(data: Any, mime: str, digest: bool) -> tuple[str, str]:
+    url = f"data:{mime};base64,{base64.b64encode(data).decode('ascii')}"
+    return url, hashlib.sha256(data).hexdigest() if digest else ""
+
+
+def _encode_frame(
+    rel_path: str,
     input_dir: Path,
     mime_type: str,
-) -> list[dict[str, str]] | None:
-    encoded: list[dict[str, str]] = []
-    for rel_path in rel_paths:
-        path = input_dir / rel_path
-        if not path.exists():
-            print(f"[error] missing frame: {path}")
-            return None
-        data = path.read_bytes()
-        encoded.append(
-            {
-                "mime": mime_type,
-                "data": base64.b64encode(data).decode("ascii"),
-            }
-        )
-    return encoded
+    url_prefix: str | None = None,
+    digest: bool = False,
+) -> dict[str, str] | None:
+    path = input_dir / rel_path
+    path_str = os.path.abspath(path)
+    try:
+        mtime_ns = os.stat(path_str).st_mtime_ns
+    except FileNotFoundError:
+        _LOG.error("[error] missing frame: %s", path)
+        return None
+    if url_prefix is not None:
+        # The backend fetches the frame itself; nothing is read or encoded here.
+        url = f"{url_prefix}/{urllib.parse.quote(rel_path)}"
+        frame_digest = f"{rel_path}:{mtime_ns}" if digest else ""
+    else:
+        url, frame_digest = _encode_one(path_str, mtime_ns, mime_type, digest)
+    return {"mime": mime_type, "url": url, "digest": frame_digest}
+
+
+class _FrameRequestHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+def _serve_frames(input_dir: Path) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", 0), partial(_FrameRequestHandler, directory=str(input_dir))
+    )
+    threading.Thread(target=server.serve_forever, name="frame-server", daemon=True).start()
+    return server
 
 
-def _build_item(record: dict[str, Any], config: LabelerConfig) -> dict[str, Any] | None:
+def _build_item(
+    record: dict[str, Any], config: LabelerConfig, io_pool: ThreadPoolExecutor | None = None
+) -> dict[str, Any] | None:
     try:
         recent = record["recent_clip"]
         summary = record["summary_clip"]
         lookahead = record["lookahead_clip"]
         lookahead_summary = record["lookahead_summary_clip"]
     except KeyError as exc:
-        print(f"[error] missing clip field {exc} in sample {record.get('sample_id', '')}")
+        _LOG.error("[error] missing clip field %s in sample %s", exc, record.get("sample_id", ""))
         return None
     if not all(isinstance(value, list) for value in [recent, summary, lookahead, lookahead_summary]):
-        print(f"[error] clip fields must be lists in sample {record.get('sample_id', '')}")
+        _LOG.error("[error] clip fields must be lists in sample %s", record.get("sample_id", ""))
         return None
 
-    recent_payload = _encode_frames(recent, config.input_dir, config.mime_type)
-    summary_payload = _encode_frames(summary, config.input_dir, config.mime_type)
-    lookahead_payload = _encode_frames(lookahead, config.input_dir, config.mime_type)
-    lookahead_summary_payload = _encode_frames(lookahead_summary, config.input_dir, config.mime_type)
-    if any(payload is None for payload in [recent_payload, summary_payload, lookahead_payload, lookahead_summary_payload]):
+    # All frames of the sample are encoded in one map so reads of the four
+    # clips overlap when the run has an I/O pool (io_workers > 1).
+    encode = partial(
+        _encode_frame,
+        input_dir=config.input_dir,
+        mime_type=config.mime_type,
+        url_prefix=config.image_url_prefix,
+        digest=config.cache_enabled,
+    )
+    rel_paths = [*recent, *summary, *lookahead, *lookahead_summary]
+    if io_pool is not None:
+        frames = list(io_pool.map(encode, rel_paths))
+    else:
+        frames = list(map(encode, rel_paths))
+    if any(frame is None for frame in frames):
         return None
+    cut_summary = len(recent)
+    cut_lookahead = cut_summary + len(summary)
+    cut_lookahead_summary = cut_lookahead + len(lookahead)
+    recent_payload = frames[:cut_summary]
+    summary_payload = frames[cut_summary:cut_lookahead]
+    lookahead_payload = frames[cut_lookahead:cut_lookahead_summary]
+    lookahead_summary_payload = frames[cut_lookahead_summary:]
 
     goal = record.get("goal_t") or record.get("goal") or ""
     instruct = record.get("instruct_t") or record.get("labeling_instruct") or ""
@@ -187,8 +339,8 @@ def _build_item(record: dict[str, Any], config: LabelerConfig) -> dict[str, Any]
 def _normalize_output(raw: Any) -> dict[str, Any] | None:
     if isinstance(raw, str):
         try:
-            raw = json.loads(raw)
-        except json.JSONDecodeError:
+            raw = orjson.loads(raw)
+        except orjson.JSONDecodeError:
             return None
     if not isinstance(raw, dict):
         return None
@@ -210,74 +362,145 @@ def _normalize_output(raw: Any) -> dict[str, Any] | None:
     return normalized
 
 
-def _validate_output(
-    output: dict[str, Any],
+_REQUIRED_FIELDS = (
+    "goal",
+    "next_mid_step",
+    "short_goal_dsl",
+    "horizon_steps",
+    "done_evidence",
+    "fallback_if_failed",
+    "uncertainty",
+    "attempt",
+)
+_UNCERTAINTY_LEVELS = frozenset({"low", "mid", "high"})
+
+
+def _compile_validator(
     dsl_ops: set[str],
     done_evidence_enum: list[str],
     fallback_enum: list[str],
-) -> tuple[bool, list[str]]:
-    errors: list[str] = []
-    required_fields = [
-        "goal",
-        "next_mid_step",
-        "short_goal_dsl",
-        "horizon_steps",
-        "done_evidence",
-        "fallback_if_failed",
-        "uncertainty",
-        "attempt",
-    ]
-    for field in required_fields:
-        if field not in output:
-            errors.append(f"missing field: {field}")
-
-    goal = output.get("goal")
-    if not isinstance(goal, str):
-        errors.append("goal must be string")
-    elif "<|goal_start|>" not in goal or "<|goal_end|>" not in goal:
-        errors.append("goal format invalid")
-
-    short_goal_dsl = output.get("short_goal_dsl")
-    if not isinstance(short_goal_dsl, list):
-        errors.append("short_goal_dsl must be list")
-    else:
-        for entry in short_goal_dsl:
-            if not isinstance(entry, dict) or "op" not in entry:
-                errors.append("short_goal_dsl entry missing op")
-                continue
-            op = str(entry["op"])
-            if dsl_ops and op not in dsl_ops:
-                errors.append(f"unknown dsl op: {op}")
-
-    done_evidence = output.get("done_evidence")
-    if not isinstance(done_evidence, list):
-        errors.append("done_evidence must be list")
-    else:
-        if any(item for item in done_evidence_enum):
+) -> Callable[[dict[str, Any]], tuple[bool, list[str]]]:
+    # Enum lookups are resolved once per run; the returned closure only does
+    # the per-response checks. An empty enum disables its membership check.
+    dsl_op_set = frozenset(dsl_ops)
+    done_evidence_set = frozenset(done_evidence_enum) if any(done_evidence_enum) else None
+    fallback_set = frozenset(fallback_enum) if any(fallback_enum) else None
+
+    def validate(output: dict[str, Any]) -> tuple[bool, list[str]]:
+        errors = [f"missing field: {field}" for field in _REQUIRED_FIELDS if field not in output]
+
+        goal = output.get("goal")
+        if not isinstance(goal, str):
+            errors.append("goal must be string")
+        elif "<|goal_start|>" not in goal or "<|goal_end|>" not in goal:
+            errors.append("goal format invalid")
+
+        short_goal_dsl = output.get("short_goal_dsl")
+        if not isinstance(short_goal_dsl, list):
+            errors.append("short_goal_dsl must be list")
+        else:
+            for entry in short_goal_dsl:
+                if not isinstance(entry, dict) or "op" not in entry:
+                    errors.append("short_goal_dsl entry missing op")
+                    continue
+                op = str(entry["op"])
+                if dsl_op_set and op not in dsl_op_set:
+                    errors.append(f"unknown dsl op: {op}")
+
+        done_evidence = output.get("done_evidence")
+        if not isinstance(done_evidence, list):
+            errors.append("done_evidence must be list")
+        elif done_evidence_set is not None:
             for item in done_evidence:
-                if item not in done_evidence_enum:
+                if not isinstance(item, str) or item not in done_evidence_set:
                     errors.append(f"unknown done_evidence: {item}")
 
-    fallback = output.get("fallback_if_failed")
-    if not isinstance(fallback, list):
-        errors.append("fallback_if_failed must be list")
-    else:
-        if any(item for item in fallback_enum):
+        fallback = output.get("fallback_if_failed")
+        if not isinstance(fallback, list):
+            errors.append("fallback_if_failed must be list")
+        elif fallback_set is not None:
             for item in fallback:
-                if item not in fallback_enum:
+                if not isinstance(item, str) or item not in fallback_set:
                     errors.append(f"unknown fallback_if_failed: {item}")
 
-    uncertainty = output.get("uncertainty")
-    if uncertainty not in {"low", "mid", "high"}:
-        errors.append("uncertainty must be low/mid/high")
+        uncertainty = output.get("uncertainty")
+        if not isinstance(uncertainty, str) or uncertainty not in _UNCERTAINTY_LEVELS:
+            errors.append("uncertainty must be low/mid/high")
+
+        if not isinstance(output.get("horizon_steps"), int):
+            errors.append("horizon_steps must be int")
+
+        return (len(errors) == 0, errors)
+
+    return validate
+
+
+def _as_list(value: Any) -> Any:
+    if isinstance(value, (str, dict)):
+        return [value]
+    return value
+
+
+class DslOp(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    op: str
+    args: dict[str, Any] | None = None
 
-    horizon_steps = output.get("horizon_steps")
-    if not isinstance(horizon_steps, int):
-        errors.append("horizon_steps must be int")
 
-    return (len(errors) == 0, errors)
+class LabelSchema(BaseModel):
+    # Keys outside the schema are kept, as _normalize_output keeps them.
+    model_config = ConfigDict(extra="allow")
+
+    goal: str
+    next_mid_step: str
+    short_goal_dsl: list[DslOp]
+    horizon_steps: int
+    done_evidence: list[str]
+    fallback_if_failed: list[str]
+    uncertainty: Literal["low", "mid", "high"]
+    attempt: str
+
+    # Same coercions as _normalize_output, applied before type validation.
+    @field_validator("short_goal_dsl", "done_evidence", "fallback_if_failed", mode="before")
+    @classmethod
+    def _wrap_single(cls, value: Any) -> Any:
+        return _as_list(value)
+
+    @field_validator("uncertainty", mode="before")
+    @classmethod
+    def _lower_uncertainty(cls, value: Any) -> Any:
+        return value.lower() if isinstance(value, str) else value
+
+    @field_validator("goal")
+    @classmethod
+    def _check_goal(cls, value: str) -> str:
+        if "<|goal_start|>" not in value or "<|goal_end|>" not in value:
+            raise ValueError("goal format invalid")
+        return value
+
+
+def _label_schema(
+    dsl_ops: set[str],
+    done_evidence_enum: list[str],
+    fallback_enum: list[str],
+) -> type[LabelSchema]:
+    # Narrows the enum-backed fields to the values loaded for this run; an
+    # empty enum leaves the field as free text, as in _compile_validator.
+    fields: dict[str, Any] = {}
+    if dsl_ops:
+        op_model = create_model(
+            "DslOp", __base__=DslOp, op=(Literal[tuple(sorted(dsl_ops))], ...)
+        )
+        fields["short_goal_dsl"] = (list[op_model], ...)
+    if any(done_evidence_enum):
+        fields["done_evidence"] = (list[Literal[tuple(done_evidence_enum)]], ...)
+    if any(fallback_enum):
+        fields["fallback_if_failed"] = (list[Literal[tuple(fallback_enum)]], ...)
+    return create_model("LabelSchema", __base__=LabelSchema, **fields)
 
 
+@cache
 def _default_system_prompt() -> str:
     return "\n".join(
         [
@@ -298,6 +521,7 @@ def _default_system_prompt() -> str:
     )
 
 
+@cache
 def _default_prompts_dir() -> Path:
     return Path(__file__).resolve().parent / "prompts"
 
@@ -314,22 +538,36 @@ def _normalize_base_url(endpoint: str | None) -> str | None:
     return trimmed
 
 
-def _build_user_text(
-    item: dict[str, Any],
+def _enum_json(
     dsl_ops_enum: list[dict[str, Any]],
     done_evidence_enum: list[str],
     fallback_enum: list[str],
     include_enums: bool,
-) -> str:
-    lines = [
+) -> dict[str, str]:
+    # Serialized once per run and shared by every prompt.
+    if not include_enums:
+        return {
+            "dsl_ops_enum": "omitted",
+            "done_evidence_enum": "omitted",
+            "fallback_actions_enum": "omitted",
+        }
+    return {
+        "dsl_ops_enum": orjson.dumps(dsl_ops_enum).decode(),
+        "done_evidence_enum": orjson.dumps(done_evidence_enum).decode(),
+        "fallback_actions_enum": orjson.dumps(fallback_enum).decode(),
+    }
+
+
+_USER_TEXT_TEMPLATE = "\n".join(
+    [
         "Input fields:",
-        f"sample_id: {item.get('sample_id', '')}",
-        f"goal: {item.get('goal', '')}",
-        f"labeling_instruct: {item.get('labeling_instruct', '')}",
-        f"recent_clip: {len(item.get('recent_clip', []))} frames attached",
-        f"summary_clip: {len(item.get('summary_clip', []))} frames attached",
-        f"lookahead_clip: {len(item.get('lookahead_clip', []))} frames attached",
-        f"lookahead_summary_clip: {len(item.get('lookahead_summary_clip', []))} frames attached",
+        "sample_id: {sample_id}",
+        "goal: {goal}",
+        "labeling_instruct: {labeling_instruct}",
+        "recent_clip: {recent_count} frames attached",
+        "summary_clip: {summary_count} frames attached",
+        "lookahead_clip: {lookahead_count} frames attached",
+        "lookahead_summary_clip: {lookahead_summary_count} frames attached",
         "Field definitions:",
         "goal: <|goal_start|>long_goal/mid_goal<|goal_end|> format.",
         "next_mid_step: detailed next step for the mid goal.",
@@ -340,18 +578,35 @@ def _build_user_text(
         "uncertainty: low/mid/high.",
         "attempt: include history summary, current reasoning, next plan.",
     ]
-    if include_enums:
-        lines.extend(
-            [
-                "Enums:",
-                f"dsl_ops_enum: {json.dumps(dsl_ops_enum, ensure_ascii=False)}",
-                f"done_evidence_enum: {json.dumps(done_evidence_enum, ensure_ascii=False)}",
-                f"fallback_actions_enum: {json.dumps(fallback_enum, ensure_ascii=False)}",
-            ]
-        )
-    else:
-        lines.append("Enums: omitted")
-    return "\n".join(lines)
+)
+_USER_TEXT_WITH_ENUMS = "\n".join(
+    [
+        _USER_TEXT_TEMPLATE,
+        "Enums:",
+        "dsl_ops_enum: {dsl_ops_enum}",
+        "done_evidence_enum: {done_evidence_enum}",
+        "fallback_actions_enum: {fallback_actions_enum}",
+    ]
+)
+_USER_TEXT_WITHOUT_ENUMS = _USER_TEXT_TEMPLATE + "\nEnums: omitted"
+
+
+def _build_user_text(
+    item: dict[str, Any],
+    enum_json: dict[str, str],
+    include_enums: bool,
+) -> str:
+    template = _USER_TEXT_WITH_ENUMS if include_enums else _USER_TEXT_WITHOUT_ENUMS
+    return template.format(
+        sample_id=item.get("sample_id", ""),
+        goal=item.get("goal", ""),
+        labeling_instruct=item.get("labeling_instruct", ""),
+        recent_count=len(item.get("recent_clip", [])),
+        summary_count=len(item.get("summary_clip", [])),
+        lookahead_count=len(item.get("lookahead_clip", [])),
+        lookahead_summary_count=len(item.get("lookahead_summary_clip", [])),
+        **enum_json,
+    )
 
 
 def _augment_user_text_for_ollama(user_text: str, item: dict[str, Any]) -> str:
@@ -371,10 +626,7 @@ def _augment_user_text_for_ollama(user_text: str, item: dict[str, Any]) -> str:
 def _render_user_prompt(
     template: str,
     item: dict[str, Any],
-    dsl_ops_enum: list[dict[str, Any]],
-    done_evidence_enum: list[str],
-    fallback_enum: list[str],
-    include_enums: bool,
+    enum_json: dict[str, str],
 ) -> str:
     return template.format_map(
         {
@@ -385,83 +637,119 @@ def _render_user_prompt(
             "summary_count": len(item.get("summary_clip", [])),
             "lookahead_count": len(item.get("lookahead_clip", [])),
             "lookahead_summary_count": len(item.get("lookahead_summary_clip", [])),
-            "dsl_ops_enum": json.dumps(dsl_ops_enum, ensure_ascii=False)
-            if include_enums
-            else "omitted",
-            "done_evidence_enum": json.dumps(done_evidence_enum, ensure_ascii=False)
-            if include_enums
-            else "omitted",
-            "fallback_actions_enum": json.dumps(fallback_enum, ensure_ascii=False)
-            if include_enums
-            else "omitted",
+            **enum_json,
         }
     )
 
 
 def _append_clip(content: list[dict[str, Any]], label: str, frames: list[dict[str, str]]) -> None:
-    content.append({"type": "text", "text": f"{label} ({len(frames)} frames):"})
-    for idx, frame in enumerate(frames, start=1):
-        content.append({"type": "text", "text": f"{label} frame {idx}"})
-        content.append(
-            {
-                "type": "image_url",
-                "image_url": {
-                    "url": f"data:{frame.get('mime', 'image/jpeg')};base64,{frame.get('data', '')}"
-                },
-            }
-        )
+    # One header per clip; the images follow in frame order without captions.
+    content.append({"type": "text", "text": f"{label} ({len(frames)} frames, in order):"})
+    content.extend({"type": "image_url", "image_url": {"url": frame["url"]}} for frame in frames)
+
+
+def _user_text(item: dict[str, Any], config: LabelerConfig, enum_json: dict[str, str]) -> str:
+    if config.user_prompt_template:
+        return _render_user_prompt(config.user_prompt_template, item, enum_json)
+    return _build_user_text(item, enum_json, config.include_enums)
 
 
 def _build_messages(
     item: dict[str, Any],
-    config: LabelerConfig,
-    dsl_ops_enum: list[dict[str, Any]],
-    done_evidence_enum: list[str],
-    fallback_enum: list[str],
+    user_text: str,
+    system_message: SystemMessage,
 ) -> list[Any]:
-    system_prompt = config.system_prompt or _default_system_prompt()
-    if config.user_prompt_template:
-        user_text = _render_user_prompt(
-            config.user_prompt_template,
-            item,
-            dsl_ops_enum,
-            done_evidence_enum,
-            fallback_enum,
-            config.include_enums,
-        )
-    else:
-        user_text = _build_user_text(
-            item, dsl_ops_enum, done_evidence_enum, fallback_enum, config.include_enums
-        )
     content: list[dict[str, Any]] = [{"type": "text", "text": user_text}]
     _append_clip(content, "recent_clip", item.get("recent_clip", []))
     _append_clip(content, "summary_clip", item.get("summary_clip", []))
     _append_clip(content, "lookahead_clip", item.get("lookahead_clip", []))
     _append_clip(content, "lookahead_summary_clip", item.get("lookahead_summary_clip", []))
-    return [SystemMessage(content=system_prompt), HumanMessage(content=content)]
+    return [system_message, HumanMessage(content=content)]
 
 
-def _request_with_retries(
+def _open_cache(path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE IF NOT EXISTS labels (key TEXT PRIMARY KEY, label TEXT NOT NULL)")
+    return conn
+
+
+def _cache_key(parts: Iterable[str], item: dict[str, Any]) -> str:
+    # Frames contribute their per-frame digest (content hash, or path and
+    # mtime for served URLs), computed once per frame rather than per sample.
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    for key in _CLIP_KEYS:
+        for frame in item[key]:
+            digest.update(frame["digest"].encode("utf-8"))
+            digest.update(b"\0")
+    return digest.hexdigest()
+
+
+async def _ainvoke_with_retries(
     llm: ChatOpenAI,
-    messages_batch: list[list[Any]],
+    messages: list[Any],
     config: LabelerConfig,
-) -> tuple[list[Any], float]:
+    semaphore: asyncio.Semaphore,
+) -> tuple[Any, float]:
     last_error: Exception | None = None
     for attempt in range(1, config.max_retries + 1):
-        start = time.monotonic()
-        try:
-            result = llm.batch(messages_batch, {"max_concurrency": config.max_concurrency})
-            duration = time.monotonic() - start
-            return result, duration
-        except Exception as exc:
-            duration = time.monotonic() - start
-            last_error = exc
-            print(f"[retry] attempt {attempt}/{config.max_retries} failed after {duration:.2f}s: {exc}")
-            if attempt < config.max_retries:
-                time.sleep(config.retry_backoff_sec * (2 ** (attempt - 1)))
+        # The semaphore is released while backing off so other samples keep
+        # the connection slots busy.
+        async with semaphore:
+            start = time.monotonic()
+            try:
+                result = await llm.ainvoke(messages)
+                return result, time.monotonic() - start
+            except Exception as exc:
+                duration = time.monotonic() - start
+                last_error = exc
+        _LOG.warning(
+            "[retry] attempt %d/%d failed after %.2fs: %s",
+            attempt,
+            config.max_retries,
+            duration,
+            last_error,
+        )
+        if attempt < config.max_retries:
+            await asyncio.sleep(config.retry_backoff_sec * (2 ** (attempt - 1)))
     raise RuntimeError(f"request failed after {config.max_retries} attempts: {last_error}")
 
 
+class _JsonArg:
+    """Log argument serialized only when the record is actually emitted."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+    def __str__(self) -> str:
+        return orjson.dumps(self.value).decode()
+
+
+class _DeferredQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Records are queued as-is; %-formatting (and any JSON dump in the
+        # args) runs on the listener thread instead of the event loop.
+        return record
+
+
+def _start_logging(log_responses: bool) -> QueueListener:
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    _LOG.handlers.clear()
+    _LOG.addHandler(_DeferredQueueHandler(log_queue))
+    _LOG.setLevel(logging.INFO)
+    _LOG.propagate = False
+    _RESPONSE_LOG.setLevel(logging.DEBUG if log_responses else logging.INFO)
+    listener = QueueListener(log_queue, handler)
+    listener.start()
+    return listener
+
+
 def _extract_items(response: list[Any]) -> list[Any]:
     return response
 
@@ -474,7 +762,7 @@ def _should_label(record: dict[str, Any], overwrite: bool) -> bool:
 
 def _format_payload(items: list[dict[str, Any]], full: bool) -> str:
     if full:
-        return json.dumps(items, ensure_ascii=False)
+        return orjson.dumps(items).decode()
     trimmed_items: list[dict[str, Any]] = []
     for item in items:
         entry = dict(item)
@@ -485,15 +773,65 @@ def _format_payload(items: list[dict[str, Any]], full: bool) -> str:
             "lookahead_summary_clip",
         ]:
             if key in entry and isinstance(entry[key], list):
-                entry[key] = [f"<base64:{len(frame.get('data', ''))}>" for frame in entry[key]]
+                entry[key] = [
+                    f"<base64:{len(frame['url']) - frame['url'].find(',') - 1}>"
+                    if frame["url"].startswith("data:")
+                    else frame["url"]
+                    for frame in entry[key]
+                ]
         trimmed_items.append(entry)
-    return json.dumps(trimmed_items, ensure_ascii=False)
+    return orjson.dumps(trimmed_items).decode()
 
 
-def run_labeler(config: LabelerConfig) -> int:
+def _ollama_label(
+    item: dict[str, Any],
+    config: LabelerConfig,
+    ollama_endpoint: str,
+    system_prompt: str,
+    user_text: str,
+) -> tuple[str, float]:
+    user_text = _augment_user_text_for_ollama(user_text, item)
+    payload = {
+        "model": config.model,
+        "stream": False,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {
+                "role": "user",
+                "content": user_text,
+                "images": _flatten_images(item),
+            },
+        ],
+    }
+    if config.ollama_format:
+        payload["format"] = config.ollama_format
+    options: dict[str, Any] = {"temperature": config.temperature}
+    if config.ollama_num_predict is not None:
+        options["num_predict"] = config.ollama_num_predict
+    if options:
+        payload["options"] = options
+    response, duration = _ollama_request_with_retries(ollama_endpoint, payload, config)
+    _RESPONSE_LOG.debug("[response] %s", _JsonArg(response))
+    content = response.get("message", {}).get("content", "")
+    if (
+        config.ollama_fallback_no_format
+        and config.ollama_format
+        and (not content.strip() or _normalize_output(content) is None)
+    ):
+        fallback_payload = dict(payload)
+        fallback_payload.pop("format", None)
+        fallback_response, fallback_duration = _ollama_request_with_retries(
+            ollama_endpoint, fallback_payload, config
+        )
+        _RESPONSE_LOG.debug("[response] %s", _JsonArg(fallback_response))
+        content = fallback_response.get("message", {}).get("content", "")
+        duration = fallback_duration
+    return content, duration
+
+
+async def _run_labeler_async(config: LabelerConfig) -> int:
     index_path = config.index_path or config.input_dir / "clip_index.jsonl"
     output_path = config.output_index_path or index_path
-    records = _read_jsonl(index_path)
 
     dsl_ops, dsl_op_names = _load_dsl_ops(config.dsl_ops_path)
     dsl_ops_summary = _summarize_dsl_ops(dsl_ops)
@@ -502,14 +840,32 @@ def run_labeler(config: LabelerConfig) -> int:
         config.fallback_actions_path, ("fallback_actions", "fallbacks", "done_evidence")
     )
 
-    indices = [idx for idx, record in enumerate(records) if _should_label(record, config.overwrite)]
-    if config.limit is not None:
-        indices = indices[: config.limit]
+    # Labels are appended to a patch journal as they arrive and merged into
+    # the index once at the end. A journal left behind by an interrupted run
+    # is carried into this one: its patches seed the updates and their
+    # samples are not requested again. The output is always rebuilt from
+    # index_path, so this holds when output_index_path is a separate file.
+    journal_path = _journal_path(output_path)
+    recovered: dict[int, dict[str, Any]] = {}
+    if not config.dry_run and journal_path.exists():
+        recovered = _matching_patches(index_path, _load_journal(journal_path))
+        _LOG.info("[recover] patches=%d journal=%s", len(recovered), journal_path)
+
+    # The index is streamed: only batches in flight and label patches are
+    # kept in memory.
+    samples = islice(
+        (
+            (idx, record)
+            for idx, record in _iter_jsonl(index_path)
+            if idx not in recovered and _should_label(record, config.overwrite)
+        ),
+        config.limit,
+    )
+    updates: dict[int, dict[str, Any]] = dict(recovered)
 
-    total = len(indices)
-    print(f"[start] samples={total} index={index_path}")
+    _LOG.info("[start] index=%s limit=%s", index_path, config.limit)
     if config.dry_run:
-        print("[info] dry_run enabled; no updates will be written")
+        _LOG.info("[info] dry_run enabled; no updates will be written")
     base_url = config.base_url or _normalize_base_url(config.endpoint)
     use_ollama = (
         config.backend == "ollama"
@@ -536,14 +892,32 @@ def run_labeler(config: LabelerConfig) -> int:
         config.user_prompt_template = _load_prompt_text(user_prompt_path)
 
     system_prompt = config.system_prompt or _default_system_prompt()
+    system_message = SystemMessage(content=system_prompt)
+    enum_json = _enum_json(dsl_ops_summary, done_evidence_enum, fallback_enum, config.include_enums)
     if config.log_requests:
-        print(f"[prompt] system={system_prompt}")
+        _LOG.info("[prompt] system=%s", system_prompt)
     llm = None
+    label_schema = None
+    http_client = None
     ollama_endpoint = None
     if not config.dry_run:
         if use_ollama:
             ollama_endpoint = _resolve_ollama_endpoint(config)
         else:
+            # One pooled client for the whole run so every request after the
+            # first reuses a keep-alive connection instead of reconnecting.
+            # With http2 (needs the h2 package) concurrent requests share one
+            # multiplexed connection when the server negotiates it; the limits
+            # only matter if it falls back to HTTP/1.1.
+            concurrency = max(1, config.max_concurrency)
+            http_client = httpx.AsyncClient(
+                http2=config.http2,
+                limits=httpx.Limits(
+                    max_connections=concurrency * 2,
+                    max_keepalive_connections=concurrency,
+                ),
+                timeout=config.timeout_sec,
+            )
             llm = ChatOpenAI(
                 model=config.model,
                 api_key=config.api_key,
@@ -551,141 +925,250 @@ def run_labeler(config: LabelerConfig) -> int:
                 timeout=config.timeout_sec,
                 temperature=config.temperature,
                 max_retries=0,
+                http_async_client=http_client,
             )
-
-    updated = 0
-    for batch_start in range(0, total, config.batch_size):
-        batch_indices = indices[batch_start : batch_start + config.batch_size]
-        batch_items: list[dict[str, Any]] = []
-        batch_record_map: list[int] = []
-        messages_batch: list[list[Any]] = []
-
-        for idx in batch_indices:
-            item = _build_item(records[idx], config)
-            if item is None:
-                continue
-            batch_items.append(item)
-            batch_record_map.append(idx)
-            if not use_ollama:
-                messages_batch.append(
-                    _build_messages(item, config, dsl_ops_summary, done_evidence_enum, fallback_enum)
+            if config.structured_output:
+                label_schema = _label_schema(dsl_op_names, done_evidence_enum, fallback_enum)
+                llm = llm.bind(
+                    response_format={
+                        "type": "json_schema",
+                        "json_schema": {
+                            "name": "label",
+                            "schema": label_schema.model_json_schema(),
+                        },
+                    }
                 )
 
-        if not batch_items:
-            continue
+    frame_server = None
+    if config.serve_frames and config.image_url_prefix is None and not use_ollama:
+        frame_server = _serve_frames(config.input_dir)
+        config.image_url_prefix = f"http://127.0.0.1:{frame_server.server_port}"
+        _LOG.info("[info] serving frames from %s at %s", config.input_dir, config.image_url_prefix)
+
+    cache = None
+    cache_parts: tuple[str, ...] = ()
+    cache_hits = 0
+    if config.cache_enabled and not config.dry_run:
+        cache = _open_cache(config.cache_path or config.input_dir / ".labeler_cache.sqlite3")
+        # Everything besides the user text and frames that shapes the answer.
+        cache_parts = (
+            "ollama" if use_ollama else "openai",
+            config.model or "",
+            system_prompt,
+            "structured" if label_schema is not None else "",
+        )
 
-        # if config.log_requests:
-        #     print(
-        #         f"[request] batch={batch_start // config.batch_size} "
-        #         f"{_format_payload(batch_items, config.log_full_payload)}"
-        #     )
+    # Owned by this run so its size follows this run's io_workers.
+    io_pool = None
+    if config.io_workers > 1:
+        io_pool = ThreadPoolExecutor(max_workers=config.io_workers, thread_name_prefix="frame-io")
 
-        if config.dry_run:
-            continue
+    semaphore = asyncio.Semaphore(max(1, config.max_concurrency))
+    validate_output = _compile_validator(dsl_op_names, done_evidence_enum, fallback_enum)
 
-        durations: list[float] = []
+    def prepare_sample(record: dict[str, Any]) -> tuple[Any, ...] | None:
+        # (item, user text, messages, cache key) for one record.
+        item = _build_item(record, config, io_pool)
+        if item is None:
+            return None
+        user_text = _user_text(item, config, enum_json)
+        messages = None if use_ollama else _build_messages(item, user_text, system_message)
+        cache_key = None
+        if cache is not None:
+            cache_key = _cache_key(cache_parts + (user_text,), item)
+        return item, user_text, messages, cache_key
+
+    async def label_one(
+        item: dict[str, Any], user_text: str, messages: list[Any] | None
+    ) -> tuple[Any, float]:
         if use_ollama:
-            items: list[Any] = []
-            for item in batch_items:
-                if config.user_prompt_template:
-                    user_text = _render_user_prompt(
-                        config.user_prompt_template,
-                        item,
-                        dsl_ops_summary,
-                        done_evidence_enum,
-                        fallback_enum,
-                        config.include_enums,
-                    )
-                else:
-                    user_text = _build_user_text(
-                        item, dsl_ops_summary, done_evidence_enum, fallback_enum, config.include_enums
-                    )
-                user_text = _augment_user_text_for_ollama(user_text, item)
-                payload = {
-                    "model": config.model,
-                    "stream": False,
-                    "messages": [
-                        {"role": "system", "content": system_prompt},
-                        {
-                            "role": "user",
-                            "content": user_text,
-                            "images": _flatten_images(item),
-                        },
-                    ],
-                }
-                if config.ollama_format:
-                    payload["format"] = config.ollama_format
-                options: dict[str, Any] = {"temperature": config.temperature}
-                if config.ollama_num_predict is not None:
-                    options["num_predict"] = config.ollama_num_predict
-                if options:
-                    payload["options"] = options
-                response, duration = _ollama_request_with_retries(ollama_endpoint or "", payload, config)
-                if config.log_responses:
-                    print(f"[response] {json.dumps(response, ensure_ascii=False)}")
-                content = response.get("message", {}).get("content", "")
-                if (
-                    config.ollama_fallback_no_format
-                    and config.ollama_format
-                    and (not content.strip() or _normalize_output(content) is None)
-                ):
-                    fallback_payload = dict(payload)
-                    fallback_payload.pop("format", None)
-                    fallback_response, fallback_duration = _ollama_request_with_retries(
-                        ollama_endpoint or "", fallback_payload, config
-                    )
-                    if config.log_responses:
-                        print(f"[response] {json.dumps(fallback_response, ensure_ascii=False)}")
-                    content = fallback_response.get("message", {}).get("content", "")
-                    duration = fallback_duration
-                items.append(content)
-                durations.append(duration)
-        else:
-            response, duration = _request_with_retries(llm, messages_batch, config)
-            if config.log_responses:
-                print(
-                    f"[response] batch={batch_start // config.batch_size} "
-                    f"{json.dumps([getattr(item, 'content', item) for item in response], ensure_ascii=False)}"
+            async with semaphore:
+                return await asyncio.to_thread(
+                    _ollama_label,
+                    item,
+                    config,
+                    ollama_endpoint or "",
+                    system_prompt,
+                    user_text,
                 )
-            items = _extract_items(response)
-            durations = [duration for _ in items]
-        if len(items) != len(batch_record_map):
-            print(
-                f"[warn] response items {len(items)} != request items {len(batch_record_map)}"
-            )
+        return await _ainvoke_with_retries(llm, messages, config, semaphore)
+
+    async def produce() -> None:
+        nonlocal total
+        try:
+            for entry in samples:
+                await work.put(entry)
+                total += 1
+        except Exception as exc:
+            await results.put(exc)
+            return
+        for _ in range(worker_count):
+            await work.put(None)
 
-        updated_in_batch = 0
-        for idx_offset, (record_idx, raw_item) in enumerate(zip(batch_record_map, items)):
-            sample_id = records[record_idx].get("sample_id", "")
-            content = getattr(raw_item, "content", raw_item)
+    async def worker() -> None:
+        nonlocal cache_hits
+        try:
+            while (entry := await work.get()) is not None:
+                # Frame reads and base64 encoding happen off the event loop so
+                # requests already in flight are not stalled by disk I/O.
+                prepared = await asyncio.to_thread(prepare_sample, entry[1])
+                if prepared is None or config.dry_run:
+                    continue
+                item, user_text, messages, cache_key = prepared
+                # A cached label stands in for the response text.
+                row = None
+                if cache_key is not None:
+                    row = cache.execute("SELECT label FROM labels WHERE key = ?", (cache_key,)).fetchone()
+                if row is not None:
+                    cache_hits += 1
+                    await results.put((entry, row[0], 0.0, None))
+                    continue
+                result, duration = await label_one(item, user_text, messages)
+                if not use_ollama and _RESPONSE_LOG.isEnabledFor(logging.DEBUG):
+                    _RESPONSE_LOG.debug(
+                        "[response] sample=%s %s",
+                        entry[1].get("sample_id", ""),
+                        _JsonArg(getattr(result, "content", result)),
+                    )
+                await results.put((entry, result, duration, cache_key))
+        except Exception as exc:
+            await results.put(exc)
+            return
+        await results.put(None)
+
+    def apply_result(
+        entry: tuple[int, dict[str, Any]],
+        raw_item: Any,
+        duration: float,
+        cache_key: str | None,
+    ) -> bool:
+        record_idx, record = entry
+        sample_id = record.get("sample_id", "")
+        content = getattr(raw_item, "content", raw_item)
+        if label_schema is not None:
+            # One pydantic-core pass parses, coerces and validates.
+            try:
+                parsed = label_schema.model_validate_json(content)
+            except ValidationError as exc:
+                errors = [f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in exc.errors()]
+                _LOG.error("[error] validation failed for %s: %s", sample_id, errors)
+                return False
+            normalized = parsed.model_dump(exclude_unset=True)
+        else:
             normalized = _normalize_output(content)
             if normalized is None:
-                print(f"[error] invalid response for {sample_id}; not JSON")
-                continue
-            if config.validate:
-                ok, errors = _validate_output(
-                    normalized, dsl_op_names, done_evidence_enum, fallback_enum
-                )
-                if not ok:
-                    print(f"[error] validation failed for {sample_id}: {errors}")
-                    continue
+                _LOG.error("[error] invalid response for %s; not JSON", sample_id)
+                return False
+        if config.validate and label_schema is None:
+            ok, errors = validate_output(normalized)
+            if not ok:
+                _LOG.error("[error] validation failed for %s: %s", sample_id, errors)
+                return False
+
+        if cache_key is not None:
+            cache.execute(
+                "INSERT OR REPLACE INTO labels (key, label) VALUES (?, ?)",
+                (cache_key, orjson.dumps(normalized).decode()),
+            )
+        patch = {"idx": record_idx, "sample_id": sample_id, "patch": normalized}
+        updates[record_idx] = patch
+        if journal is not None:
+            journal.write(orjson.dumps(patch, option=orjson.OPT_APPEND_NEWLINE))
+        summary = {
+            "sample_id": sample_id,
+            "duration_sec": round(duration, 2),
+            "uncertainty": normalized.get("uncertainty"),
+            "horizon_steps": normalized.get("horizon_steps"),
+        }
+        _LOG.info("[sample] %s", _JsonArg(summary))
+        return True
 
-            records[record_idx].update(normalized)
-            updated += 1
-            updated_in_batch += 1
-            summary = {
-                "sample_id": sample_id,
-                "duration_sec": round(durations[idx_offset], 2) if idx_offset < len(durations) else None,
-                "uncertainty": normalized.get("uncertainty"),
-                "horizon_steps": normalized.get("horizon_steps"),
-            }
-            print(f"[sample] {json.dumps(summary, ensure_ascii=False)}")
-
-        if not config.dry_run and config.flush_every_batch and updated_in_batch:
-            _write_jsonl(output_path, records)
-            print(f"[flush] updated={updated} output={output_path}")
+    def flush() -> None:
+        if cache is not None:
+            cache.commit()
+        if journal is not None:
+            journal.flush()
+            _LOG.info("[flush] updated=%d journal=%s", updated, journal_path)
+
+    # Samples flow through a bounded queue to a pool of workers, so a slow
+    # request only holds up its own worker and the index is still streamed.
+    # There are twice as many workers as request slots: the spare ones
+    # encode the next samples and take over slots released during backoff.
+    worker_count = 2 * max(1, config.max_concurrency)
+    work: asyncio.Queue = asyncio.Queue(maxsize=worker_count)
+    results: asyncio.Queue = asyncio.Queue()
+    updated = 0
+    total = 0
+    journal = None
+    if not config.dry_run and config.flush_every_batch:
+        journal = journal_path.open("wb", buffering=_WRITE_BUFFER)
+        # Recovered patches go into the new journal so a second interruption
+        # still keeps them.
+        for patch in recovered.values():
+            journal.write(orjson.dumps(patch, option=orjson.OPT_APPEND_NEWLINE))
+        journal.flush()
+    tasks = [asyncio.create_task(produce())]
+    tasks.extend(asyncio.create_task(worker()) for _ in range(worker_count))
+    try:
+        # Results are applied in completion order; persistence is debounced
+        # to every `batch_size` labels or `_FLUSH_INTERVAL_SEC` seconds.
+        running = worker_count
+        unflushed = 0
+        last_flush = time.monotonic()
+        while running:
+            result = await results.get()
+            if result is None:
+                running -= 1
+                continue
+            if isinstance(result, Exception):
+                raise result
+            if apply_result(*result):
+                updated += 1
+                unflushed += 1
+            if unflushed and (
+                unflushed >= config.batch_size
+                or time.monotonic() - last_flush >= _FLUSH_INTERVAL_SEC
+            ):
+                flush()
+                unflushed = 0
+                last_flush = time.monotonic()
+        if unflushed:
+            flush()
+    finally:
+        for task in tasks:
+            task.cancel()
+        if journal is not None:
+            journal.close()
+        if io_pool is not None:
+            io_pool.shutdown(cancel_futures=True)
+        if cache is not None:
+            cache.commit()
+            cache.close()
+        if http_client is not None:
+            await http_client.aclose()
+        if frame_server is not None:
+            frame_server.shutdown()
+            frame_server.server_close()
+            config.image_url_prefix = None
 
     if not config.dry_run:
-        _write_jsonl(output_path, records)
-        print(f"[done] updated={updated} output={output_path}")
+        await asyncio.to_thread(_write_jsonl, output_path, index_path, updates)
+        journal_path.unlink(missing_ok=True)
+        _LOG.info(
+            "[done] samples=%d updated=%d cache_hits=%d output=%s",
+            total,
+            updated,
+            cache_hits,
+            output_path,
+        )
     return updated
+
+
+def run_labeler(config: LabelerConfig) -> int:
+    listener = _start_logging(config.log_responses)
+    try:
+        return asyncio.run(_run_labeler_async(config))
+    finally:
+        _encode_one.cache_clear()
+        listener.stop()
+        _LOG.handlers.clear()
@@ -1,13 +1,16 @@
 from __future__ import annotations
 
-import json
+import codecs
+import hashlib
+import os
 import sys
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO, Callable
 
-from PySide6.QtCore import QProcess, QTimer, Qt
+import orjson
+from PySide6.QtCore import QIODevice, QObject, QProcess, QThread, QTimer, Qt, Signal, Slot
 from PySide6.QtWidgets import (
     QApplication,
     QCheckBox,
@@ -30,6 +33,11 @@ from PySide6.QtWidgets import (
 )
 
 
+_LOG_TAIL_MS = 250
+_JSON_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE
+_LOG_MAX_BLOCKS = 10000
+
+
 @dataclass
 class RunContext:
     run_id: str
@@ -38,8 +46,40 @@ class RunContext:
     command: list[str]
 
 
-def _repo_root() -> Path:
-    return Path(__file__).resolve().parents[4]
+_REPO_ROOT = Path(__file__).resolve().parents[3]
+_SCRIPTS_DIR = _REPO_ROOT / "scripts"
+_CLIP_EXTRACTOR_SCRIPT = str(_SCRIPTS_DIR / "clip_extractor.py")
+_VLM_LABELER_SCRIPT = str(_SCRIPTS_DIR / "vlm_labeler.py")
+_BUILDER_SCRIPTS = {
+    "planner": str(_SCRIPTS_DIR / "dataset_builder_planner.py"),
+    "controller": str(_SCRIPTS_DIR / "dataset_builder_controller.py"),
+}
+
+
+def _set_path(widget: QWidget, value: Any) -> None:
+    widget._edit.setText(str(value))  # type: ignore[attr-defined]
+
+
+def _set_choice(widget: QComboBox, value: Any) -> None:
+    idx = widget.findText(str(value))
+    if idx >= 0:
+        widget.setCurrentIndex(idx)
+
+
+# (getter, setter) pairs used by the config binding tables; setters cast the
+# value loaded from JSON.
+_Accessor = tuple[Callable[[Any], Any], Callable[[Any, Any], None]]
+_PATH: _Accessor = (lambda widget: widget._edit.text().strip(), _set_path)
+_TEXT: _Accessor = (lambda widget: widget.text().strip(), lambda widget, value: widget.setText(str(value)))
+_RAW_TEXT: _Accessor = (QLineEdit.text, lambda widget, value: widget.setText(str(value)))
+_INT: _Accessor = (QSpinBox.value, lambda widget, value: widget.setValue(int(value)))
+_FLOAT: _Accessor = (QDoubleSpinBox.value, lambda widget, value: widget.setValue(float(value)))
+_BOOL: _Accessor = (QCheckBox.isChecked, lambda widget, value: widget.setChecked(bool(value)))
+_CHOICE: _Accessor = (QComboBox.currentText, _set_choice)
+
+
+def _digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=8).digest()
 
 
 def _run_id(module: str) -> str:
@@ -48,7 +88,71 @@ def _run_id(module: str) -> str:
     return f"{stamp}_{safe}"
 
 
+class LogTailWorker(QObject):
+    """Follows a run's log files on a worker thread and emits display text."""
+
+    text_ready = Signal(str)
+
+    def __init__(self, paths: dict[str, Path]) -> None:
+        super().__init__()
+        self._paths = paths
+        # stream -> (read handle, UTF-8 decoder, incomplete last line)
+        self._tails: dict[str, tuple[BinaryIO, codecs.IncrementalDecoder, str]] = {}
+        self._timer: QTimer | None = None
+
+    @Slot()
+    def start(self) -> None:
+        for stream, path in self._paths.items():
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+            self._tails[stream] = (path.open("rb"), decoder, "")
+        self._timer = QTimer(self)
+        self._timer.setInterval(_LOG_TAIL_MS)
+        self._timer.timeout.connect(self.read_tails)
+        self._timer.start()
+
+    @Slot()
+    def read_tails(self, final: bool = False, message: str | None = None) -> None:
+        entries: list[str] = []
+        for stream, (handle, decoder, partial) in self._tails.items():
+            # Only new bytes are decoded; the decoder holds back a multibyte
+            # sequence split across reads.
+            text = partial + decoder.decode(handle.read(), final)
+            # An incomplete last line waits for the next read unless the
+            # process is gone.
+            cut = len(text) if final else text.rfind("\n") + 1
+            self._tails[stream] = (handle, decoder, text[cut:])
+            entries.extend(f"[{stream}] {line}" for line in text[:cut].splitlines())
+        if message is not None:
+            entries.append(message)
+        if entries:
+            self.text_ready.emit("\n".join(entries))
+
+    @Slot(str)
+    def add_message(self, message: str) -> None:
+        # GUI messages pass through here so they land after the output that
+        # was written before them.
+        self.read_tails(message=message)
+
+    @Slot(str)
+    def finish(self, message: str) -> None:
+        self.read_tails(final=True, message=message)
+        self.thread().quit()
+
+    @Slot()
+    def close(self) -> None:
+        # Runs on the worker thread as it exits, so the timer is stopped by
+        # the thread that owns it.
+        if self._timer is not None:
+            self._timer.stop()
+        for handle, _, _ in self._tails.values():
+            handle.close()
+        self._tails.clear()
+
+
 class TrainingGUI(QMainWindow):
+    _log_message = Signal(str)
+    _log_finish = Signal(str)
+
     def __init__(self) -> None:
         super().__init__()
         self.setWindowTitle("Training GUI")
@@ -57,9 +161,18 @@ class TrainingGUI(QMainWindow):
         self._process: QProcess | None = None
         self._stdout_path: Path | None = None
         self._stderr_path: Path | None = None
+        # The process writes its output straight to the run log files; a
+        # LogTailWorker follows them off the GUI thread.
+        self._log_thread: QThread | None = None
+        self._log_worker: LogTailWorker | None = None
+        self._log_live = False
         self._run_context: RunContext | None = None
-        self._config_dir = _repo_root() / "config" / "gui"
+        self._config_dir = _REPO_ROOT / "config" / "gui"
+        # module -> digest of the config file as last read or written.
+        self._config_hashes: dict[str, bytes] = {}
 
+        # module -> (config key, widget, accessor) rows shared by collect/apply.
+        self._config_bindings: dict[str, tuple[tuple[str, QWidget, _Accessor], ...]] = {}
         self._tabs = QTabWidget()
         self._clip_tab = self._build_clip_tab()
         self._builder_tab = self._build_builder_tab()
@@ -75,6 +188,7 @@ class TrainingGUI(QMainWindow):
         self._log_view = QPlainTextEdit()
         self._log_view.setReadOnly(True)
         self._log_view.setLineWrapMode(QPlainTextEdit.NoWrap)
+        self._log_view.setMaximumBlockCount(_LOG_MAX_BLOCKS)
 
         self._start_btn = QPushButton("Start")
         self._stop_btn = QPushButton("Stop")
@@ -143,6 +257,17 @@ class TrainingGUI(QMainWindow):
         form.addRow("export ratio", self._clip_export_ratio)
         form.addRow("link mode", self._clip_link_mode)
         form.addRow("seed", self._clip_seed)
+        self._config_bindings["clip_extractor"] = (
+            ("zip_path", self._clip_zip, _PATH),
+            ("output_dir", self._clip_output, _PATH),
+            ("fps", self._clip_fps, _INT),
+            ("step", self._clip_step, _INT),
+            ("allow_partial", self._clip_allow_partial, _BOOL),
+            ("export_clips", self._clip_export, _BOOL),
+            ("export_ratio", self._clip_export_ratio, _FLOAT),
+            ("link_mode", self._clip_link_mode, _CHOICE),
+            ("seed", self._clip_seed, _INT),
+        )
 
         group = QGroupBox("Clip Extractor")
         group.setLayout(form)
@@ -205,6 +330,23 @@ class TrainingGUI(QMainWindow):
         form.addRow("", self._label_flush)
         form.addRow("ollama format", self._label_ollama_format)
         form.addRow("ollama num_predict", self._label_ollama_num_predict)
+        self._config_bindings["vlm_labeler"] = (
+            ("input_dir", self._label_input_dir, _PATH),
+            ("backend", self._label_backend, _CHOICE),
+            ("base_url", self._label_base_url, _TEXT),
+            ("model", self._label_model, _TEXT),
+            ("api_key", self._label_api_key, _RAW_TEXT),
+            ("batch_size", self._label_batch, _INT),
+            ("max_retries", self._label_retries, _INT),
+            ("timeout_sec", self._label_timeout, _FLOAT),
+            ("temperature", self._label_temperature, _FLOAT),
+            ("limit", self._label_limit, _INT),
+            ("include_enums", self._label_include_enums, _BOOL),
+            ("validate", self._label_validate, _BOOL),
+            ("flush_every_batch", self._label_flush, _BOOL),
+            ("ollama_format", self._label_ollama_format, _TEXT),
+            ("ollama_num_predict", self._label_ollama_num_predict, _INT),
+        )
 
         group = QGroupBox("VLM Labeler")
         group.setLayout(form)
@@ -229,6 +371,12 @@ class TrainingGUI(QMainWindow):
         form.addRow("input dir", self._builder_input_dir)
         form.addRow("output dir", self._builder_output_dir)
         form.addRow("", self._builder_allow_empty_retrieval)
+        self._config_bindings["dataset_builder"] = (
+            ("mode", self._builder_mode, _CHOICE),
+            ("input_dir", self._builder_input_dir, _PATH),
+            ("output_dir", self._builder_output_dir, _PATH),
+            ("allow_empty_retrieval", self._builder_allow_empty_retrieval, _BOOL),
+        )
 
         group = QGroupBox("Dataset Builder")
         group.setLayout(form)
@@ -283,146 +431,46 @@ class TrainingGUI(QMainWindow):
         path = self._config_path(module)
         if not path.exists():
             return {}
+        raw = path.read_bytes()
+        self._config_hashes[module] = _digest(raw)
         try:
-            return json.loads(path.read_text(encoding="utf-8"))
-        except json.JSONDecodeError:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
             return {}
 
     def _save_module_config(self, module: str, data: dict[str, Any]) -> None:
+        # Unchanged configs are not rewritten; changed ones are swapped in
+        # atomically so a crash mid-write keeps the previous file.
+        raw = orjson.dumps(data, option=_JSON_OPTIONS)
+        digest = _digest(raw)
+        if self._config_hashes.get(module) == digest:
+            return
         path = self._config_path(module)
-        path.write_text(json.dumps(data, ensure_ascii=True, indent=2), encoding="utf-8")
+        tmp_path = path.with_suffix(".json.tmp")
+        tmp_path.write_bytes(raw)
+        os.replace(tmp_path, path)
+        self._config_hashes[module] = digest
 
     def _load_or_init_configs(self) -> None:
-        clip = self._load_module_config("clip_extractor")
-        if clip:
-            self._apply_clip_config(clip)
-        else:
-            self._save_module_config("clip_extractor", self._collect_clip_config())
-
-        builder = self._load_module_config("dataset_builder")
-        if builder:
-            self._apply_builder_config(builder)
-        else:
-            self._save_module_config("dataset_builder", self._collect_builder_config())
-
-        labeler = self._load_module_config("vlm_labeler")
-        if labeler:
-            self._apply_labeler_config(labeler)
-        else:
-            self._save_module_config("vlm_labeler", self._collect_labeler_config())
+        for module in self._config_bindings:
+            config = self._load_module_config(module)
+            if config:
+                self._apply_config(module, config)
+            else:
+                self._save_module_config(module, self._collect_config(module))
 
         if not self._config_path("planner").exists():
             self._save_module_config("planner", {"module": "planner"})
         if not self._config_path("controller").exists():
             self._save_module_config("controller", {"module": "controller"})
 
-    def _collect_clip_config(self) -> dict[str, Any]:
-        return {
-            "zip_path": self._get_path_value(self._clip_zip),
-            "output_dir": self._get_path_value(self._clip_output),
-            "fps": self._clip_fps.value(),
-            "step": self._clip_step.value(),
-            "allow_partial": self._clip_allow_partial.isChecked(),
-            "export_clips": self._clip_export.isChecked(),
-            "export_ratio": self._clip_export_ratio.value(),
-            "link_mode": self._clip_link_mode.currentText(),
-            "seed": self._clip_seed.value(),
-        }
-
-    def _apply_clip_config(self, config: dict[str, Any]) -> None:
-        if "zip_path" in config:
-            self._clip_zip._edit.setText(str(config["zip_path"]))  # type: ignore[attr-defined]
-        if "output_dir" in config:
-            self._clip_output._edit.setText(str(config["output_dir"]))  # type: ignore[attr-defined]
-        if "fps" in config:
-            self._clip_fps.setValue(int(config["fps"]))
-        if "step" in config:
-            self._clip_step.setValue(int(config["step"]))
-        if "allow_partial" in config:
-            self._clip_allow_partial.setChecked(bool(config["allow_partial"]))
-        if "export_clips" in config:
-            self._clip_export.setChecked(bool(config["export_clips"]))
-        if "export_ratio" in config:
-            self._clip_export_ratio.setValue(float(config["export_ratio"]))
-        if "link_mode" in config:
-            idx = self._clip_link_mode.findText(str(config["link_mode"]))
-            if idx >= 0:
-                self._clip_link_mode.setCurrentIndex(idx)
-        if "seed" in config:
-            self._clip_seed.setValue(int(config["seed"]))
-
-    def _collect_labeler_config(self) -> dict[str, Any]:
-        return {
-            "input_dir": self._get_path_value(self._label_input_dir),
-            "backend": self._label_backend.currentText(),
-            "base_url": self._label_base_url.text().strip(),
-            "model": self._label_model.text().strip(),
-            "api_key": self._label_api_key.text(),
-            "batch_size": self._label_batch.value(),
-            "max_retries": self._label_retries.value(),
-            "timeout_sec": self._label_timeout.value(),
-            "temperature": self._label_temperature.value(),
-            "limit": self._label_limit.value(),
-            "include_enums": self._label_include_enums.isChecked(),
-            "validate": self._label_validate.isChecked(),
-            "flush_every_batch": self._label_flush.isChecked(),
-            "ollama_format": self._label_ollama_format.text().strip(),
-            "ollama_num_predict": self._label_ollama_num_predict.value(),
-        }
-
-    def _apply_labeler_config(self, config: dict[str, Any]) -> None:
-        if "input_dir" in config:
-            self._label_input_dir._edit.setText(str(config["input_dir"]))  # type: ignore[attr-defined]
-        if "backend" in config:
-            idx = self._label_backend.findText(str(config["backend"]))
-            if idx >= 0:
-                self._label_backend.setCurrentIndex(idx)
-        if "base_url" in config:
-            self._label_base_url.setText(str(config["base_url"]))
-        if "model" in config:
-            self._label_model.setText(str(config["model"]))
-        if "api_key" in config:
-            self._label_api_key.setText(str(config["api_key"]))
-        if "batch_size" in config:
-            self._label_batch.setValue(int(config["batch_size"]))
-        if "max_retries" in config:
-            self._label_retries.setValue(int(config["max_retries"]))
-        if "timeout_sec" in config:
-            self._label_timeout.setValue(float(config["timeout_sec"]))
-        if "temperature" in config:
-            self._label_temperature.setValue(float(config["temperature"]))
-        if "limit" in config:
-            self._label_limit.setValue(int(config["limit"]))
-        if "include_enums" in config:
-            self._label_include_enums.setChecked(bool(config["include_enums"]))
-        if "validate" in config:
-            self._label_validate.setChecked(bool(config["validate"]))
-        if "flush_every_batch" in config:
-            self._label_flush.setChecked(bool(config["flush_every_batch"]))
-        if "ollama_format" in config:
-            self._label_ollama_format.setText(str(config["ollama_format"]))
-        if "ollama_num_predict" in config:
-            self._label_ollama_num_predict.setValue(int(config["ollama_num_predict"]))
-
-    def _collect_builder_config(self) -> dict[str, Any]:
-        return {
-            "mode": self._builder_mode.currentText(),
-            "input_dir": self._get_path_value(self._builder_input_dir),
-            "output_dir": self._get_path_value(self._builder_output_dir),
-            "allow_empty_retrieval": self._builder_allow_empty_retrieval.isChecked(),
-        }
-
-    def _apply_builder_config(self, config: dict[str, Any]) -> None:
-        if "mode" in config:
-            idx = self._builder_mode.findText(str(config["mode"]))
-            if idx >= 0:
-                self._builder_mode.setCurrentIndex(idx)
-        if "input_dir" in config:
-            self._builder_input_dir._edit.setText(str(config["input_dir"]))  # type: ignore[attr-defined]
-        if "output_dir" in config:
-            self._builder_output_dir._edit.setText(str(config["output_dir"]))  # type: ignore[attr-defined]
-        if "allow_empty_retrieval" in config:
-            self._builder_allow_empty_retrieval.setChecked(bool(config["allow_empty_retrieval"]))
+    def _collect_config(self, module: str) -> dict[str, Any]:
+        return {key: getter(widget) for key, widget, (getter, _) in self._config_bindings[module]}
+
+    def _apply_config(self, module: str, config: dict[str, Any]) -> None:
+        for key, widget, (_, setter) in self._config_bindings[module]:
+            if key in config:
+                setter(widget, config[key])
 
     def _start_clicked(self) -> None:
         if self._process is not None:
@@ -434,41 +482,44 @@ class TrainingGUI(QMainWindow):
             QMessageBox.information(self, "Not Implemented", "This module is not implemented yet.")
             return
 
+        # Widgets are read once; the same values drive the command, the run
+        # config.json and the saved module config.
         if current is self._clip_tab:
-            module, command, config = self._build_clip_command()
+            collected = self._collect_config("clip_extractor")
+            module, command, config = self._build_clip_command(collected)
         elif current is self._builder_tab:
-            module, command, config = self._build_builder_command()
+            collected = self._collect_config("dataset_builder")
+            module, command, config = self._build_builder_command(collected)
         else:
-            module, command, config = self._build_labeler_command()
+            collected = self._collect_config("vlm_labeler")
+            module, command, config = self._build_labeler_command(collected)
 
         if command is None:
             return
 
         run_id = _run_id(module)
-        run_dir = _repo_root() / "runs" / run_id
+        run_dir = _REPO_ROOT / "runs" / run_id
         log_dir = run_dir / "logs"
         log_dir.mkdir(parents=True, exist_ok=True)
         self._stdout_path = log_dir / "stdout.log"
         self._stderr_path = log_dir / "stderr.log"
+        self._stdout_path.touch()
+        self._stderr_path.touch()
         config_path = run_dir / "config.json"
-        config_path.write_text(json.dumps(config, ensure_ascii=True, indent=2), encoding="utf-8")
+        config_path.write_bytes(orjson.dumps(config, option=_JSON_OPTIONS))
 
         self._run_context = RunContext(run_id=run_id, run_dir=run_dir, module=module, command=command)
         self._run_label.setText(run_id)
         self._status_label.setText("Running")
+        self._stop_log_thread()
         self._log_view.clear()
 
-        if module == "clip_extractor":
-            self._save_module_config("clip_extractor", self._collect_clip_config())
-        if module == "dataset_builder":
-            self._save_module_config("dataset_builder", self._collect_builder_config())
-        if module == "vlm_labeler":
-            self._save_module_config("vlm_labeler", self._collect_labeler_config())
+        self._save_module_config(module, collected)
 
         process = QProcess(self)
         process.setProcessChannelMode(QProcess.SeparateChannels)
-        process.readyReadStandardOutput.connect(self._handle_stdout)
-        process.readyReadStandardError.connect(self._handle_stderr)
+        process.setStandardOutputFile(str(self._stdout_path), QIODevice.Append)
+        process.setStandardErrorFile(str(self._stderr_path), QIODevice.Append)
         process.finished.connect(self._process_finished)
 
         self._process = process
@@ -478,6 +529,7 @@ class TrainingGUI(QMainWindow):
         program = command[0]
         args = command[1:]
         process.start(program, args)
+        self._start_log_worker()
 
     def _stop_clicked(self) -> None:
         if not self._process:
@@ -492,101 +544,96 @@ class TrainingGUI(QMainWindow):
             self._process.kill()
 
     def _process_finished(self) -> None:
-        self._append_log("[info] process finished")
+        if self._log_live:
+            self._log_live = False
+            self._log_finish.emit("[info] process finished")
+        else:
+            self._append_log("[info] process finished")
         self._process = None
         self._start_btn.setEnabled(True)
         self._stop_btn.setEnabled(False)
         self._status_label.setText("Idle")
 
-    def _handle_stdout(self) -> None:
-        if not self._process:
-            return
-        data = self._process.readAllStandardOutput().data().decode("utf-8", errors="replace")
-        self._append_log(data, stream="stdout")
-
-    def _handle_stderr(self) -> None:
-        if not self._process:
-            return
-        data = self._process.readAllStandardError().data().decode("utf-8", errors="replace")
-        self._append_log(data, stream="stderr")
-
-    def _append_log(self, text: str, stream: str | None = None) -> None:
-        if not text:
-            return
-        if stream:
-            prefix = f"[{stream}] "
+    def _append_log(self, text: str) -> None:
+        if self._log_live:
+            self._log_message.emit(text)
         else:
-            prefix = ""
-        for line in text.splitlines():
-            entry = prefix + line
-            self._log_view.appendPlainText(entry)
-            log_path = self._stdout_path
-            if stream == "stderr":
-                log_path = self._stderr_path or self._stdout_path
-            if log_path:
-                with log_path.open("a", encoding="utf-8") as handle:
-                    handle.write(entry + "\n")
-
-    def _build_clip_command(self) -> tuple[str, list[str] | None, dict[str, Any]]:
-        zip_path = self._get_path_value(self._clip_zip)
-        out_dir = self._get_path_value(self._clip_output)
+            self._log_view.appendPlainText(text)
+
+    def _start_log_worker(self) -> None:
+        thread = QThread()
+        worker = LogTailWorker({"stdout": self._stdout_path, "stderr": self._stderr_path})
+        worker.moveToThread(thread)
+        thread.started.connect(worker.start)
+        thread.finished.connect(worker.close, Qt.DirectConnection)
+        worker.text_ready.connect(self._log_view.appendPlainText)
+        self._log_message.connect(worker.add_message)
+        self._log_finish.connect(worker.finish)
+        self._log_thread = thread
+        self._log_worker = worker
+        self._log_live = True
+        thread.start()
+
+    def _stop_log_thread(self) -> None:
+        # The worker is only released once its thread has exited.
+        if self._log_thread is None or self._log_worker is None:
+            return
+        self._log_live = False
+        self._log_message.disconnect(self._log_worker.add_message)
+        self._log_finish.disconnect(self._log_worker.finish)
+        self._log_thread.quit()
+        self._log_thread.wait()
+        self._log_thread = None
+        self._log_worker = None
+
+    def _build_clip_command(
+        self, collected: dict[str, Any]
+    ) -> tuple[str, list[str] | None, dict[str, Any]]:
+        zip_path = collected["zip_path"]
+        out_dir = collected["output_dir"]
         if not zip_path or not out_dir:
             QMessageBox.warning(self, "Missing input", "zip path and output dir are required.")
             return "clip_extractor", None, {}
 
-        script = _repo_root() / "scripts" / "clip_extractor.py"
         cmd = [
             sys.executable,
-            str(script),
+            _CLIP_EXTRACTOR_SCRIPT,
             "--zip",
             zip_path,
             "--output",
             out_dir,
             "--fps",
-            str(self._clip_fps.value()),
+            str(collected["fps"]),
             "--step",
-            str(self._clip_step.value()),
+            str(collected["step"]),
             "--export-ratio",
-            str(self._clip_export_ratio.value()),
+            str(collected["export_ratio"]),
             "--link-mode",
-            self._clip_link_mode.currentText(),
+            collected["link_mode"],
             "--seed",
-            str(self._clip_seed.value()),
+            str(collected["seed"]),
+            *(("--allow-partial",) if collected["allow_partial"] else ()),
+            *(("--export-clips",) if collected["export_clips"] else ()),
         ]
-        if self._clip_allow_partial.isChecked():
-            cmd.append("--allow-partial")
-        if self._clip_export.isChecked():
-            cmd.append("--export-clips")
-
-        config = {
-            "module": "clip_extractor",
-            "zip_path": zip_path,
-            "output_dir": out_dir,
-            "fps": self._clip_fps.value(),
-            "step": self._clip_step.value(),
-            "allow_partial": self._clip_allow_partial.isChecked(),
-            "export_clips": self._clip_export.isChecked(),
-            "export_ratio": self._clip_export_ratio.value(),
-            "link_mode": self._clip_link_mode.currentText(),
-            "seed": self._clip_seed.value(),
-            "command": cmd,
-        }
+
+        config = {"module": "clip_extractor", **collected, "command": cmd}
         return "clip_extractor", cmd, config
 
-    def _build_labeler_command(self) -> tuple[str, list[str] | None, dict[str, Any]]:
-        input_dir = self._get_path_value(self._label_input_dir)
-        base_url = self._label_base_url.text().strip()
-        model = self._label_model.text().strip()
-        api_key = self._label_api_key.text().strip()
-        backend = self._label_backend.currentText()
+    def _build_labeler_command(
+        self, collected: dict[str, Any]
+    ) -> tuple[str, list[str] | None, dict[str, Any]]:
+        input_dir = collected["input_dir"]
+        base_url = collected["base_url"]
+        model = collected["model"]
+        api_key = collected["api_key"].strip()
+        backend = collected["backend"]
         if not input_dir or not base_url or not model:
             QMessageBox.warning(self, "Missing input", "input dir, base url, model are required.")
             return "vlm_labeler", None, {}
 
-        script = _repo_root() / "scripts" / "vlm_labeler.py"
         cmd = [
             sys.executable,
-            str(script),
+            _VLM_LABELER_SCRIPT,
             "--input-dir",
             input_dir,
             "--base-url",
@@ -596,94 +643,61 @@ class TrainingGUI(QMainWindow):
             "--backend",
             backend,
             "--batch-size",
-            str(self._label_batch.value()),
+            str(collected["batch_size"]),
             "--max-retries",
-            str(self._label_retries.value()),
+            str(collected["max_retries"]),
             "--timeout",
-            str(self._label_timeout.value()),
+            str(collected["timeout_sec"]),
             "--temperature",
-            str(self._label_temperature.value()),
+            str(collected["temperature"]),
+            *(("--api-key", api_key) if api_key else ()),
+            *(() if collected["include_enums"] else ("--no-enums",)),
+            *(() if collected["validate"] else ("--skip-validation",)),
+            *(() if collected["flush_every_batch"] else ("--no-flush-every-batch",)),
+            *(("--limit", str(collected["limit"])) if collected["limit"] > 0 else ()),
+            *(self._ollama_args(collected) if backend == "ollama" else ()),
         ]
-        if api_key:
-            cmd.extend(["--api-key", api_key])
-        if not self._label_include_enums.isChecked():
-            cmd.append("--no-enums")
-        if not self._label_validate.isChecked():
-            cmd.append("--skip-validation")
-        if not self._label_flush.isChecked():
-            cmd.append("--no-flush-every-batch")
-        if self._label_limit.value() > 0:
-            cmd.extend(["--limit", str(self._label_limit.value())])
-
-        if backend == "ollama":
-            format_value = self._label_ollama_format.text().strip()
-            if format_value:
-                cmd.extend(["--ollama-format", format_value])
-            if self._label_ollama_num_predict.value() > 0:
-                cmd.extend(["--ollama-num-predict", str(self._label_ollama_num_predict.value())])
-
-        config = {
-            "module": "vlm_labeler",
-            "input_dir": input_dir,
-            "base_url": base_url,
-            "model": model,
-            "backend": backend,
-            "batch_size": self._label_batch.value(),
-            "max_retries": self._label_retries.value(),
-            "timeout_sec": self._label_timeout.value(),
-            "temperature": self._label_temperature.value(),
-            "limit": self._label_limit.value(),
-            "include_enums": self._label_include_enums.isChecked(),
-            "validate": self._label_validate.isChecked(),
-            "flush_every_batch": self._label_flush.isChecked(),
-            "ollama_format": self._label_ollama_format.text().strip(),
-            "ollama_num_predict": self._label_ollama_num_predict.value(),
-            "command": cmd,
-        }
+
+        # The api key is kept out of the run directory.
+        config = {key: value for key, value in collected.items() if key != "api_key"}
+        config = {"module": "vlm_labeler", **config, "command": cmd}
         return "vlm_labeler", cmd, config
 
-    def _build_builder_command(self) -> tuple[str, list[str] | None, dict[str, Any]]:
-        input_dir = self._get_path_value(self._builder_input_dir)
-        output_dir = self._get_path_value(self._builder_output_dir)
-        mode = self._builder_mode.currentText()
+    @staticmethod
+    def _ollama_args(collected: dict[str, Any]) -> tuple[str, ...]:
+        format_value = collected["ollama_format"]
+        num_predict = collected["ollama_num_predict"]
+        return (
+            *(("--ollama-format", format_value) if format_value else ()),
+            *(("--ollama-num-predict", str(num_predict)) if num_predict > 0 else ()),
+        )
+
+    def _build_builder_command(
+        self, collected: dict[str, Any]
+    ) -> tuple[str, list[str] | None, dict[str, Any]]:
+        input_dir = collected["input_dir"]
+        output_dir = collected["output_dir"]
         if not input_dir or not output_dir:
             QMessageBox.warning(self, "Missing input", "input dir and output dir are required.")
             return "dataset_builder", None, {}
 
-        if mode == "planner":
-            script = _repo_root() / "scripts" / "dataset_builder_planner.py"
-        else:
-            script = _repo_root() / "scripts" / "dataset_builder_controller.py"
-
         cmd = [
             sys.executable,
-            str(script),
+            _BUILDER_SCRIPTS[collected["mode"]],
             "--input-dir",
             input_dir,
             "--output-dir",
             output_dir,
+            *(("--allow-empty-retrieval",) if collected["allow_empty_retrieval"] else ()),
         ]
-        if self._builder_allow_empty_retrieval.isChecked():
-            cmd.append("--allow-empty-retrieval")
-
-        config = {
-            "module": "dataset_builder",
-            "mode": mode,
-            "input_dir": input_dir,
-            "output_dir": output_dir,
-            "allow_empty_retrieval": self._builder_allow_empty_retrieval.isChecked(),
-            "command": cmd,
-        }
+
+        config = {"module": "dataset_builder", **collected, "command": cmd}
         return "dataset_builder", cmd, config
 
     def closeEvent(self, event) -> None:  # type: ignore[override]
-        self._save_module_config("clip_extractor", self._collect_clip_config())
-        self._save_module_config("dataset_builder", self._collect_builder_config())
-        self._save_module_config("vlm_labeler", self._collect_labeler_config())
-        if not self._config_path("planner").exists():
-            self._save_module_config("planner", {"module": "planner"})
-        if not self._config_path("controller").exists():
-            self._save_module_config("controller", {"module": "controller"})
+        for module in self._config_bindings:
+            self._save_module_config(module, self._collect_config(module))
+        self._stop_log_thread()
         super().closeEvent(event)
 
 
@@ -0,0 +1,9 @@
+import json
+from pathlib import Path
+
+
+def write_jsonl(path: Path, records: list[dict]) -> None:
+    path.write_text(
+        "".join(json.dumps(record, ensure_ascii=True) + "\n" for record in records),
+        encoding="utf-8",
+    )
@@ -0,0 +1,78 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import unittest
+
+from _jsonl import write_jsonl
+
+
+def _run_builder(input_dir: Path, output_dir: Path, emit: str) -> None:
+    script = Path("scripts/dataset_builder.py")
+    subprocess.run(
+        [
+            sys.executable,
+            str(script),
+            "--input-dir",
+            str(input_dir),
+            "--output-dir",
+            str(output_dir),
+            "--allow-empty-retrieval",
+            "--emit",
+            emit,
+        ],
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+
+
+class TestDatasetBuilder(unittest.TestCase):
+    def test_fused_emit_matches_single_emitters(self) -> None:
+        with TemporaryDirectory() as tmpdir:
+            tmp = Path(tmpdir)
+            input_dir = tmp / "input"
+            input_dir.mkdir()
+            records = [
+                {
+                    "recent_clip": ["frames/000001.jpg"],
+                    "summary_clip": ["frames/000000.jpg"],
+                    "goal_t": "<|goal_start|>long/mid<|goal_end|>",
+                    "short_goal_dsl": [],
+                    "next_mid_step": "step",
+                    "attempt": "历史总结/当前思考/下一步规划",
+                    "action_t": "",
+                },
+                {
+                    "recent_clip": ["frames/000002.jpg"],
+                    "action_t": "<|action_start|>0 0 0 ; g1 ; g2 ; g3 ; g4 ; g5 ; g6<|action_end|>",
+                    "short_goal_dsl": [],
+                    "plan_id": "plan_1",
+                },
+            ]
+            write_jsonl(input_dir / "clip_index.jsonl", records)
+
+            fused_dir = tmp / "fused"
+            _run_builder(input_dir, fused_dir, "planner,controller")
+            for name in ("planner", "controller"):
+                single_dir = tmp / name
+                _run_builder(input_dir, single_dir, name)
+                self.assertEqual(
+                    (fused_dir / f"{name}.jsonl").read_bytes(),
+                    (single_dir / f"{name}.jsonl").read_bytes(),
+                )
+
+            report = json.loads((fused_dir / "build_report.json").read_text(encoding="utf-8"))
+            self.assertEqual(set(report), {"planner", "controller"})
+            common = {"input", "output", "total", "written", "skipped"}
+            self.assertEqual(set(report["planner"]), common | {"missing_retrieval"})
+            self.assertEqual(set(report["controller"]), common | {"missing_action"})
+            self.assertEqual(report["planner"]["written"], 1)
+            self.assertEqual(report["controller"]["written"], 1)
+            self.assertEqual(report["controller"]["missing_action"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
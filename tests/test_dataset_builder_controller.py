@@ -5,11 +5,7 @@ from pathlib import Path
 from tempfile import TemporaryDirectory
 import unittest
 
-
-def _write_jsonl(path: Path, records: list[dict]) -> None:
-    with path.open("w", encoding="utf-8") as handle:
-        for record in records:
-            handle.write(json.dumps(record, ensure_ascii=True) + "\n")
+from _jsonl import write_jsonl
 
 
 class TestDatasetBuilderController(unittest.TestCase):
@@ -33,7 +29,7 @@ class TestDatasetBuilderController(unittest.TestCase):
                     "plan_id": "plan_1",
                 },
             ]
-            _write_jsonl(input_dir / "clip_index.jsonl", records)
+            write_jsonl(input_dir / "clip_index.jsonl", records)
 
             script = Path("scripts/dataset_builder_controller.py")
             subprocess.run(
@@ -46,7 +42,8 @@ class TestDatasetBuilderController(unittest.TestCase):
                     str(output_dir),
                 ],
                 check=True,
-                capture_output=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
                 text=True,
             )
             report = json.loads((output_dir / "build_report.json").read_text(encoding="utf-8"))
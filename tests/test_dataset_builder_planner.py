@@ -1,90 +1,78 @@
 import json
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from tempfile import TemporaryDirectory
 import unittest
 
+from _jsonl import write_jsonl
 
-def _write_jsonl(path: Path, records: list[dict]) -> None:
-    with path.open("w", encoding="utf-8") as handle:
-        for record in records:
-            handle.write(json.dumps(record, ensure_ascii=True) + "\n")
+
+def _run_planner(
+    input_dir: Path, output_dir: Path, *flags: str, stdout: int = subprocess.PIPE
+) -> subprocess.CompletedProcess:
+    script = Path("scripts/dataset_builder_planner.py")
+    return subprocess.run(
+        [
+            sys.executable,
+            str(script),
+            "--input-dir",
+            str(input_dir),
+            "--output-dir",
+            str(output_dir),
+            *flags,
+        ],
+        check=True,
+        stdout=stdout,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
 
 
 class TestDatasetBuilderPlanner(unittest.TestCase):
-    def test_allow_empty_retrieval(self) -> None:
-        with TemporaryDirectory() as tmpdir:
-            tmp = Path(tmpdir)
-            input_dir = tmp / "input"
-            output_dir = tmp / "output"
-            input_dir.mkdir()
-            output_dir.mkdir()
-            record = {
-                "recent_clip": ["frames/000001.jpg"],
-                "summary_clip": ["frames/000000.jpg"],
-                "goal_t": "<|goal_start|>long/mid<|goal_end|>",
-                "short_goal_dsl": [],
-                "next_mid_step": "step",
-                "attempt": "历史总结/当前思考/下一步规划",
-            }
-            _write_jsonl(input_dir / "clip_index.jsonl", [record])
+    @classmethod
+    def setUpClass(cls) -> None:
+        # Both runs read the same fixture and only differ in flags, so they
+        # are started together and the tests check their outputs.
+        tmpdir = TemporaryDirectory()
+        cls.addClassCleanup(tmpdir.cleanup)
+        tmp = Path(tmpdir.name)
+        cls.input_dir = tmp / "input"
+        cls.input_dir.mkdir()
+        record = {
+            "recent_clip": ["frames/000001.jpg"],
+            "summary_clip": ["frames/000000.jpg"],
+            "goal_t": "<|goal_start|>long/mid<|goal_end|>",
+            "short_goal_dsl": [],
+            "next_mid_step": "step",
+            "attempt": "历史总结/当前思考/下一步规划",
+        }
+        write_jsonl(cls.input_dir / "clip_index.jsonl", [record])
 
-            script = Path("scripts/dataset_builder_planner.py")
-            result = subprocess.run(
-                [
-                    sys.executable,
-                    str(script),
-                    "--input-dir",
-                    str(input_dir),
-                    "--output-dir",
-                    str(output_dir),
-                    "--allow-empty-retrieval",
-                ],
-                check=True,
-                capture_output=True,
-                text=True,
+        cls.allow_output_dir = tmp / "allow_output"
+        cls.require_output_dir = tmp / "require_output"
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            allow = executor.submit(
+                _run_planner, cls.input_dir, cls.allow_output_dir, "--allow-empty-retrieval"
             )
-            self.assertIn('"written": 1', result.stdout)
-            output_path = output_dir / "planner.jsonl"
-            self.assertTrue(output_path.exists())
-            output = json.loads(output_path.read_text(encoding="utf-8").strip())
-            self.assertEqual(output["input"]["retrieved_memory"], {})
+            require = executor.submit(
+                _run_planner, cls.input_dir, cls.require_output_dir, stdout=subprocess.DEVNULL
+            )
+            cls.allow_result = allow.result()
+            cls.require_result = require.result()
 
-    def test_require_retrieval(self) -> None:
-        with TemporaryDirectory() as tmpdir:
-            tmp = Path(tmpdir)
-            input_dir = tmp / "input"
-            output_dir = tmp / "output"
-            input_dir.mkdir()
-            output_dir.mkdir()
-            record = {
-                "recent_clip": ["frames/000001.jpg"],
-                "summary_clip": ["frames/000000.jpg"],
-                "goal_t": "<|goal_start|>long/mid<|goal_end|>",
-                "short_goal_dsl": [],
-                "next_mid_step": "step",
-                "attempt": "历史总结/当前思考/下一步规划",
-            }
-            _write_jsonl(input_dir / "clip_index.jsonl", [record])
+    def test_allow_empty_retrieval(self) -> None:
+        self.assertIn('"written": 1', self.allow_result.stdout)
+        output_path = self.allow_output_dir / "planner.jsonl"
+        self.assertTrue(output_path.exists())
+        output = json.loads(output_path.read_text(encoding="utf-8").strip())
+        self.assertEqual(output["input"]["retrieved_memory"], {})
 
-            script = Path("scripts/dataset_builder_planner.py")
-            result = subprocess.run(
-                [
-                    sys.executable,
-                    str(script),
-                    "--input-dir",
-                    str(input_dir),
-                    "--output-dir",
-                    str(output_dir),
-                ],
-                check=True,
-                capture_output=True,
-                text=True,
-            )
-            report = json.loads((output_dir / "build_report.json").read_text(encoding="utf-8"))
-            self.assertEqual(report["written"], 0)
-            self.assertEqual(report["missing_retrieval"], 1)
+    def test_require_retrieval(self) -> None:
+        report = json.loads((self.require_output_dir / "build_report.json").read_text(encoding="utf-8"))
+        self.assertEqual(report["written"], 0)
+        self.assertEqual(report["missing_retrieval"], 1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,213 @@
+import json
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import unittest
+
+from _jsonl import write_jsonl
+
+
+_LABEL = {
+    "goal": "<|goal_start|>long/mid<|goal_end|>",
+    "next_mid_step": "step",
+    "short_goal_dsl": [],
+    "horizon_steps": 4,
+    "done_evidence": [],
+    "fallback_if_failed": [],
+    "uncertainty": "low",
+    "attempt": "历史总结/当前思考/下一步规划",
+}
+
+
+class _ChatHandler(BaseHTTPRequestHandler):
+    # Minimal OpenAI-compatible chat endpoint that always returns _LABEL.
+    protocol_version = "HTTP/1.1"
+    requests = 0
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers["Content-Length"]))
+        type(self).requests += 1
+        body = json.dumps(
+            {
+                "id": "chat",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "stub",
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": json.dumps(_LABEL)},
+                    }
+                ],
+            }
+        ).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class TestVlmLabeler(unittest.TestCase):
+    def _start_chat_server(self) -> ThreadingHTTPServer:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _ChatHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def test_recovers_journal_into_separate_output_index(self) -> None:
+        with TemporaryDirectory() as tmpdir:
+            tmp = Path(tmpdir)
+            records = [
+                {
+                    "sample_id": "s0",
+                    "recent_clip": ["frames/000000.jpg"],
+                    "summary_clip": [],
+                    "lookahead_clip": [],
+                    "lookahead_summary_clip": [],
+                },
+                {"sample_id": "s1", "next_mid_step": "done"},
+            ]
+            write_jsonl(tmp / "clip_index.jsonl", records)
+            # Left behind by a run that was interrupted before its final merge.
+            output_index = tmp / "labeled.jsonl"
+            patch = {"idx": 0, "sample_id": "s0", "patch": {"next_mid_step": "recovered"}}
+            write_jsonl(tmp / "labeled.patch.jsonl", [patch])
+
+            # Nothing is left to label, so no request reaches the unused backend.
+            script = Path("scripts/vlm_labeler.py")
+            subprocess.run(
+                [
+                    sys.executable,
+                    str(script),
+                    "--input-dir",
+                    str(tmp),
+                    "--output-index",
+                    str(output_index),
+                    "--base-url",
+                    "http://127.0.0.1:9/v1",
+                    "--model",
+                    "unused",
+                    "--api-key",
+                    "unused",
+                    "--max-retries",
+                    "0",
+                ],
+                check=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                text=True,
+            )
+            output = [json.loads(line) for line in output_index.read_text(encoding="utf-8").splitlines()]
+            self.assertEqual(output[0]["next_mid_step"], "recovered")
+            self.assertEqual(output[1], records[1])
+            self.assertFalse((tmp / "labeled.patch.jsonl").exists())
+            source = [json.loads(line) for line in (tmp / "clip_index.jsonl").read_text(encoding="utf-8").splitlines()]
+            self.assertEqual(source, records)
+
+    def test_cache_with_non_ascii_frame_urls(self) -> None:
+        server = self._start_chat_server()
+        with TemporaryDirectory() as tmpdir:
+            tmp = Path(tmpdir)
+            frame = "frames/会话1/000000.jpg"
+            (tmp / frame).parent.mkdir(parents=True)
+            (tmp / frame).write_bytes(b"\xff\xd8\xff\xd9")
+            record = {
+                "sample_id": "s0",
+                "recent_clip": [frame],
+                "summary_clip": [frame],
+                "lookahead_clip": [frame],
+                "lookahead_summary_clip": [frame],
+            }
+
+            # URL-mode frames are keyed by path and mtime; the second run on
+            # the unlabeled index is answered from the cache without a request.
+            requests = _ChatHandler.requests
+            script = Path("scripts/vlm_labeler.py")
+            for _ in range(2):
+                write_jsonl(tmp / "clip_index.jsonl", [record])
+                subprocess.run(
+                    [
+                        sys.executable,
+                        str(script),
+                        "--input-dir",
+                        str(tmp),
+                        "--base-url",
+                        f"http://127.0.0.1:{server.server_port}/v1",
+                        "--model",
+                        "stub",
+                        "--api-key",
+                        "unused",
+                        "--image-url-prefix",
+                        "http://frames.invalid",
+                        "--cache",
+                    ],
+                    check=True,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.PIPE,
+                    text=True,
+                )
+            self.assertEqual(_ChatHandler.requests - requests, 1)
+            output = json.loads((tmp / "clip_index.jsonl").read_text(encoding="utf-8"))
+            self.assertEqual(output["next_mid_step"], "step")
+
+    def test_relabels_sample_whose_recovered_patch_is_stale(self) -> None:
+        server = self._start_chat_server()
+        with TemporaryDirectory() as tmpdir:
+            tmp = Path(tmpdir)
+            frame = "frames/000000.jpg"
+            (tmp / frame).parent.mkdir(parents=True)
+            (tmp / frame).write_bytes(b"\xff\xd8\xff\xd9")
+            clips = {
+                "recent_clip": [frame],
+                "summary_clip": [frame],
+                "lookahead_clip": [frame],
+                "lookahead_summary_clip": [frame],
+            }
+            write_jsonl(
+                tmp / "clip_index.jsonl",
+                [{"sample_id": "s0", **clips}, {"sample_id": "s1", **clips}],
+            )
+            # Line 0 was rebuilt with another sample since the journal was written.
+            patches = [
+                {"idx": 0, "sample_id": "old", "patch": {"next_mid_step": "recovered"}},
+                {"idx": 1, "sample_id": "s1", "patch": {"next_mid_step": "recovered"}},
+            ]
+            write_jsonl(tmp / "clip_index.patch.jsonl", patches)
+
+            requests = _ChatHandler.requests
+            script = Path("scripts/vlm_labeler.py")
+            subprocess.run(
+                [
+                    sys.executable,
+                    str(script),
+                    "--input-dir",
+                    str(tmp),
+                    "--base-url",
+                    f"http://127.0.0.1:{server.server_port}/v1",
+                    "--model",
+                    "stub",
+                    "--api-key",
+                    "unused",
+                ],
+                check=True,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                text=True,
+            )
+            self.assertEqual(_ChatHandler.requests - requests, 1)
+            output = [json.loads(line) for line in (tmp / "clip_index.jsonl").read_text(encoding="utf-8").splitlines()]
+            self.assertEqual(output[0]["next_mid_step"], "step")
+            self.assertEqual(output[1]["next_mid_step"], "recovered")
+
+
+if __name__ == "__main__":
+    unittest.main()